@@ -0,0 +1,230 @@
+"""端到端基准测试：光栅化 → 裁剪 → 预处理 → 识别 → 写Excel
+
+用合成发票页面（已知文字）分阶段计时，输出 页/秒、单页延迟 p50/p95、峰值内存，
+结果保存为 JSON，可与之前的结果对比。
+
+示例：
+    python benchmarks/bench_pipeline.py --pages 20
+    python benchmarks/bench_pipeline.py --pages 50 --format pdf --skip-ocr
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/bench_20240101_120000.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate
+from core.excel_writer import save_results
+from core.page_source import PageRef, render_page_rgb
+from core.pipeline import crop_regions
+from core.preprocess import Preprocessor, PROFILE_AUTO, PROFILE_LABELS
+
+
+STAGES = ('rasterize', 'crop', 'preprocess', 'recognize', 'excel')
+RESULT_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def percentile(values, pct):
+    """线性插值百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * pct / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def peak_rss_mb():
+    """进程峰值内存（MB），无法获取时返回 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB，macOS 为字节
+        return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _normalize(text):
+    return ''.join(text.split()).upper()
+
+
+def summarize_stage(samples):
+    if not samples:
+        return None
+    return {
+        'count': len(samples),
+        'total_s': round(sum(samples), 4),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 2),
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+    }
+
+
+def run_format(paths, regions, expected, args, recognizer, workdir):
+    """逐页跑完整流程，返回该输入格式的统计结果"""
+    samples = {stage: [] for stage in STAGES}
+    latencies = []
+    rows = []
+    correct = 0
+    preprocessor = Preprocessor(args.preprocess)
+
+    start = time.perf_counter()
+    for path, texts in zip(paths, expected):
+        page_start = time.perf_counter()
+
+        t = time.perf_counter()
+        img = render_page_rgb(PageRef(path, 1), dpi=args.dpi)
+        samples['rasterize'].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        crops = crop_regions(img, regions, None)
+        samples['crop'].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        profile = preprocessor.select(img)
+        prepared = [preprocessor.apply(crop, profile) for crop in crops]
+        samples['preprocess'].append(time.perf_counter() - t)
+
+        if recognizer is not None:
+            t = time.perf_counter()
+            lines = recognizer.recognize(prepared)
+            samples['recognize'].append(time.perf_counter() - t)
+            row = [' '.join(region_lines) for region_lines in lines]
+            correct += sum(_normalize(got) == _normalize(want) for got, want in zip(row, texts))
+        else:
+            row = [''] * len(regions)
+
+        latencies.append(time.perf_counter() - page_start)
+        rows.append(row)
+
+    file_info = [{'filename': os.path.basename(p), 'filepath': p, 'page': 1} for p in paths]
+    t = time.perf_counter()
+    save_results(rows, file_info, len(regions), os.path.join(workdir, 'bench.xlsx'))
+    samples['excel'].append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+
+    total_fields = len(paths) * len(regions)
+    return {
+        'pages': len(paths),
+        'elapsed_s': round(elapsed, 4),
+        'pages_per_sec': round(len(paths) / elapsed, 3) if elapsed else None,
+        'latency_s': {
+            'p50': round(percentile(latencies, 50), 4),
+            'p95': round(percentile(latencies, 95), 4),
+            'max': round(max(latencies), 4),
+        },
+        'stages': {stage: summarize_stage(values) for stage, values in samples.items() if values},
+        'field_accuracy': round(correct / total_fields, 4) if recognizer is not None else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(current, previous_path):
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"\n与 {previous_path}（{previous.get('commit')}）对比：")
+    for fmt, result in current['results'].items():
+        before = previous.get('results', {}).get(fmt)
+        if not before:
+            continue
+        for label, now, then in (
+                ('页/秒', result['pages_per_sec'], before.get('pages_per_sec')),
+                ('p95 延迟(s)', result['latency_s']['p95'], before.get('latency_s', {}).get('p95'))):
+            if now is not None and then:
+                print(f"  [{fmt}] {label}: {then} → {now}（{(now - then) / then * 100:+.1f}%）")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="页面→区域→OCR→Excel 端到端基准测试")
+    parser.add_argument('--pages', type=int, default=20, help="合成页数")
+    parser.add_argument('--dpi', type=int, default=200, help="生成与光栅化使用的分辨率")
+    parser.add_argument('--format', choices=['pdf', 'png', 'both'], default='both', help="输入格式")
+    parser.add_argument('--scanned-ratio', type=float, default=0.5, help="模拟扫描件的页面比例")
+    parser.add_argument('--preprocess', choices=list(PROFILE_LABELS), default=PROFILE_AUTO,
+                        help="预处理方案")
+    parser.add_argument('--skip-ocr', action='store_true', help="不加载模型，只测光栅化/裁剪/预处理/导出")
+    parser.add_argument('--seed', type=int, default=0, help="合成文字的随机种子")
+    parser.add_argument('-o', '--output', help="结果 JSON 路径，默认写入 benchmarks/results/")
+    parser.add_argument('--compare', help="与之前的结果 JSON 对比")
+    parser.add_argument('--keep-dir', help="合成页面保存目录（默认使用临时目录并在结束后删除）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    formats = ('pdf', 'png') if args.format == 'both' else (args.format,)
+
+    recognizer, model_load = None, None
+    if not args.skip_ocr:
+        from core.engine_pool import get_engine_pool
+        from core.region_ocr import RegionRecognizer
+        # 模型加载单独计时，不计入各页延迟
+        t = time.perf_counter()
+        pool = get_engine_pool()
+        pool.warm_up(1)
+        model_load = round(time.perf_counter() - t, 3)
+        recognizer = RegionRecognizer(pool)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.keep_dir or tmp
+        print(f"生成 {args.pages} 页合成发票（{args.dpi}dpi）…")
+        outputs, regions, expected = generate(workdir, args.pages, args.dpi, formats,
+                                              args.scanned_ratio, args.seed)
+        results = {}
+        for fmt in formats:
+            print(f"运行 {fmt} …")
+            results[fmt] = run_format(outputs[fmt], regions, expected, args, recognizer, workdir)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'args': vars(args),
+        'model_load_s': model_load,
+        'results': results,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+    output = args.output or os.path.join(RESULT_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for fmt, result in results.items():
+        stages = ', '.join(f"{stage} {info['p50_ms']}ms" for stage, info in result['stages'].items())
+        print(f"[{fmt}] {result['pages_per_sec']} 页/秒，p50 {result['latency_s']['p50']}s，"
+              f"p95 {result['latency_s']['p95']}s；各阶段 p50：{stages}")
+    print(f"峰值内存 {report['peak_rss_mb']} MB，结果已保存至：{output}")
+
+    if args.compare:
+        compare(report, args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""启动导入耗时报告：用 python -X importtime 统计各入口模块的导入开销
+
+检查启动路径上没有导入 OCR/Excel 等重量级依赖（这些应在首次使用或后台预热时才加载），
+可设置总耗时预算，超出或出现不该有的模块时返回非零退出码，便于防止启动变慢。
+
+示例：
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --target ui.main_window --top 30
+    python benchmarks/import_time.py --budget-ms 1500 --save
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 各界面入口（主窗口、批量识别、框选识别）
+DEFAULT_TARGETS = ('ui.main_window', 'ocr_related.gui_bluk_scanner', 'ocr_related.ctrlc_ocr')
+# 启动时不应导入的重量级模块
+DEFERRED_MODULES = ('paddleocr', 'paddle', 'cv2', 'openpyxl', 'pandas', 'pdf2image')
+RESULT_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 [(模块名, 自身耗时us, 累计耗时us, 层级)]，顺序与输出一致"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return entries
+
+
+def profile(target, python=sys.executable):
+    """在独立进程中导入 target，返回 (条目列表, 错误信息)"""
+    proc = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=ROOT, capture_output=True, text=True)
+    entries = parse_importtime(proc.stderr)
+    error = None
+    if proc.returncode != 0:
+        lines = [line for line in proc.stderr.splitlines() if not line.startswith('import time:')]
+        error = lines[-1] if lines else f"退出码 {proc.returncode}"
+    return entries, error
+
+
+def summarize(target, entries, error, top):
+    top_level = min((depth for *_, depth in entries), default=0)
+    roots = [e for e in entries if e[3] == top_level]
+    total_us = sum(cumulative for _, _, cumulative, _ in roots)
+    imported = {name for name, *_ in entries}
+    deferred = sorted(name for name in imported
+                      if name.split('.')[0] in DEFERRED_MODULES and '.' not in name)
+    heaviest = sorted(roots, key=lambda e: e[2], reverse=True)[:top]
+    return {
+        'target': target,
+        'error': error,
+        'total_ms': round(total_us / 1000, 1),
+        'modules': len(entries),
+        'deferred_imported': deferred,
+        'heaviest': [{'module': name, 'cumulative_ms': round(cum / 1000, 1), 'self_ms': round(own / 1000, 1)}
+                     for name, own, cum, _ in heaviest],
+    }
+
+
+def print_report(report):
+    print(f"\n== {report['target']}：共 {report['total_ms']:.1f} ms，{report['modules']} 个模块")
+    if report['error']:
+        print(f"  导入失败：{report['error']}")
+    for item in report['heaviest']:
+        print(f"  {item['cumulative_ms']:>9.1f} ms  (自身 {item['self_ms']:>7.1f} ms)  {item['module']}")
+    if report['deferred_imported']:
+        print(f"  启动路径上出现了应延迟加载的模块：{', '.join(report['deferred_imported'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="界面入口导入耗时报告")
+    parser.add_argument('--target', action='append', help="要检查的模块（可多次指定），默认检查全部界面入口")
+    parser.add_argument('--top', type=int, default=15, help="显示累计耗时最高的顶层导入数量")
+    parser.add_argument('--budget-ms', type=float, help="单个入口的导入耗时上限，超出时返回非零退出码")
+    parser.add_argument('--save', action='store_true', help="把结果保存为 JSON 到 benchmarks/results")
+    args = parser.parse_args()
+
+    reports = []
+    for target in args.target or DEFAULT_TARGETS:
+        entries, error = profile(target)
+        report = summarize(target, entries, error, args.top)
+        print_report(report)
+        reports.append(report)
+
+    failed = [r['target'] for r in reports if r['error'] or r['deferred_imported']
+              or (args.budget_ms is not None and r['total_ms'] > args.budget_ms)]
+
+    if args.save:
+        os.makedirs(RESULT_DIR, exist_ok=True)
+        path = os.path.join(RESULT_DIR, f"import_time_{datetime.now():%Y%m%d_%H%M%S}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'budget_ms': args.budget_ms, 'reports': reports},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存：{path}")
+
+    if failed:
+        print(f"\n未通过：{', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
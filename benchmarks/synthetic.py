@@ -0,0 +1,93 @@
+"""生成已知文字的合成发票页面（PNG / 光栅 PDF），供基准测试使用"""
+import os
+import random
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+
+PAGE_SIZE_INCH = (8.27, 11.69)  # A4
+FONT_CANDIDATES = [
+    "C:/Windows/Fonts/arial.ttf",
+    "C:/Windows/Fonts/simhei.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+]
+
+# 字段名, 左上角（页面宽高比例）, 区域宽度（页面宽度比例）, 文本生成函数
+FIELDS = [
+    ("invoice_no", (0.62, 0.06), 0.30, lambda rnd: f"No {rnd.randint(10000000, 99999999)}"),
+    ("date", (0.62, 0.10), 0.30, lambda rnd: f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"),
+    ("buyer", (0.08, 0.18), 0.50, lambda rnd: f"BUYER CO LTD {rnd.randint(100, 999)}"),
+    ("tax_id", (0.08, 0.22), 0.50, lambda rnd: f"91{rnd.randint(10 ** 15, 10 ** 16 - 1)}"),
+    ("amount", (0.62, 0.70), 0.30, lambda rnd: f"{rnd.randint(100, 99999)}.{rnd.randint(0, 99):02d}"),
+    ("tax", (0.62, 0.74), 0.30, lambda rnd: f"{rnd.randint(10, 9999)}.{rnd.randint(0, 99):02d}"),
+    ("seller", (0.08, 0.82), 0.50, lambda rnd: f"SELLER TRADING {rnd.randint(100, 999)}"),
+]
+
+
+def load_font(size):
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            return ImageFont.truetype(path, size)
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 的默认字体不能调整大小
+        return ImageFont.load_default()
+
+
+def page_pixels(dpi):
+    return int(PAGE_SIZE_INCH[0] * dpi), int(PAGE_SIZE_INCH[1] * dpi)
+
+
+def make_page(index, dpi=200, scanned=False, seed=0):
+    """生成一页，返回 (图像, 区域列表, 期望文本列表)；scanned=True 时加入模糊和噪点模拟扫描件"""
+    rnd = random.Random(seed * 100003 + index)
+    width, height = page_pixels(dpi)
+    img = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+    font_size = max(12, dpi // 8)
+    font = load_font(font_size)
+
+    # 表格线，接近真实发票的版面
+    line_width = max(1, dpi // 100)
+    for y in (0.15, 0.30, 0.66, 0.79, 0.92):
+        draw.line([(int(0.05 * width), int(y * height)), (int(0.95 * width), int(y * height))],
+                  fill='black', width=line_width)
+
+    regions, texts = [], []
+    pad = font_size // 3
+    for _, (fx, fy), fw, make_text in FIELDS:
+        text = make_text(rnd)
+        x, y = int(fx * width), int(fy * height)
+        draw.text((x, y), text, fill='black', font=font)
+        regions.append((x - pad, y - pad, x + int(fw * width), y + font_size + 2 * pad))
+        texts.append(text)
+
+    if scanned:
+        img = img.rotate(rnd.uniform(-0.5, 0.5), fillcolor='white').filter(ImageFilter.GaussianBlur(0.6))
+        noise = Image.effect_noise(img.size, 18).convert('RGB')
+        img = Image.blend(img, noise, 0.08)
+    return img, regions, texts
+
+
+def generate(directory, pages=20, dpi=200, formats=('pdf', 'png'), scanned_ratio=0.5, seed=0):
+    """写出合成页面，返回 {格式: [文件路径]}、区域列表与每页期望文本
+
+    所有页面版面相同（区域一致），PDF 为每页一个文件，便于与实际批量识别的输入对应。
+    """
+    os.makedirs(directory, exist_ok=True)
+    outputs = {fmt: [] for fmt in formats}
+    expected = []
+    regions = None
+    for i in range(pages):
+        img, page_regions, texts = make_page(i, dpi, scanned=i < pages * scanned_ratio, seed=seed)
+        regions = regions or page_regions
+        expected.append(texts)
+        for fmt in formats:
+            path = os.path.join(directory, f"page_{i:04d}.{fmt}")
+            if fmt == 'pdf':
+                img.save(path, 'PDF', resolution=dpi)
+            else:
+                img.save(path)
+            outputs[fmt].append(path)
+    return outputs, regions, expected
@@ -0,0 +1,170 @@
+"""命令行批量识别：PDF/图片目录 + 区域模板 → Excel（不依赖 PyQt5 / tkinter）
+
+示例：
+    python cli.py invoices/ --template templates/增值税发票.json -o 结果.xlsx --workers 4
+    python cli.py "scans/*.pdf" --template 增值税发票
+    python cli.py mixed/ --auto          # 每页自动匹配 templates/ 中的模板
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from datetime import datetime
+
+from core import metrics
+from core.batch_engine import BatchEngine, FAILED_TEMPLATE, UNMATCHED_TEMPLATE, default_workers
+from core.excel_writer import save_results, routed_headers
+from core.page_source import PDF_DPI, list_pages
+from core.preprocess import PROFILE_AUTO, PROFILE_LABELS
+from core.region_ocr import DEFAULT_BATCH_SIZE
+from core.template_index import TemplateIndex
+from core.templates import TEMPLATE_DIR, load_template, template_path
+
+
+SUPPORTED_EXTS = ('.pdf', '.png', '.jpg', '.jpeg', '.bmp')
+
+
+def collect_inputs(inputs):
+    """展开目录与通配符，返回排序后的文件列表"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in os.listdir(item)]
+        else:
+            candidates = glob.glob(item)
+        paths.extend(p for p in candidates
+                     if os.path.isfile(p) and p.lower().endswith(SUPPORTED_EXTS))
+    return sorted(set(paths))
+
+
+def guarded_rows(rows, total, failure_row, errors):
+    """逐页产出；迭代中途出错时剩余页写入失败标记，已识别的页照常写入Excel"""
+    done = 0
+    try:
+        for row in rows:
+            done += 1
+            yield row
+    except Exception as e:
+        errors.append(e)
+        print(f"\n批量识别中断：{str(e)}", file=sys.stderr)
+        for _ in range(done, total):
+            yield failure_row(e)
+
+
+def report_failures(engine, errors):
+    """有失败页时给出提示并返回非零退出码"""
+    if errors:
+        print(f"批量识别中断，未完成的页已标记为识别失败：{errors[0]}", file=sys.stderr)
+        return 1
+    if engine.failed_pages:
+        print(f"有 {engine.failed_pages} 页识别失败（已在结果中标记）", file=sys.stderr)
+        return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="批量识别发票区域并导出Excel")
+    parser.add_argument('inputs', nargs='+', help="输入目录或通配符（如 scans/*.pdf）")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('-t', '--template', help="区域模板文件（.json）或模板目录中的模板名")
+    group.add_argument('--auto', nargs='?', const=TEMPLATE_DIR, metavar='DIR',
+                       help="按页面版面自动匹配模板目录（默认 templates）中的模板，适用于混合版面")
+    parser.add_argument('-o', '--output', help="输出Excel路径，默认按时间戳生成")
+    parser.add_argument('-w', '--workers', type=int, default=default_workers(), help="识别进程数")
+    parser.add_argument('-b', '--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="识别批大小")
+    parser.add_argument('--pages-per-task', type=int, default=2, help="每个任务合并的页数")
+    parser.add_argument('--dpi', type=int, default=PDF_DPI, help="PDF 光栅化分辨率")
+    parser.add_argument('--preprocess', choices=list(PROFILE_LABELS), default=PROFILE_AUTO,
+                        help="预处理方案：auto 自动判断电子版/扫描件，none/fast/full 固定方案")
+    parser.add_argument('--no-align', action='store_true', help="不按模板参考图逐页对齐区域")
+    parser.add_argument('--metrics', help="开启性能统计并导出到该文件（.json 或 .csv）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = collect_inputs(args.inputs)
+    if not paths:
+        print("未找到可处理的文件", file=sys.stderr)
+        return 1
+
+    if args.metrics:
+        metrics.enable()
+    refs, file_info = list_pages(paths)
+    output_path = args.output or f"批量识别结果_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    if args.auto:
+        return run_routed(args, refs, file_info, output_path)
+
+    path = args.template if os.path.exists(args.template) else template_path(args.template)
+    template = load_template(path)
+    reference = None if args.no_align else template['reference']
+    print(f"共 {len(paths)} 个文件 {len(refs)} 页，模板「{template['name']}」"
+          f"{'（逐页对齐）' if reference else ''}，{args.workers} 个进程")
+
+    engine = BatchEngine(workers=args.workers, dpi=args.dpi, target_size=template['image_size'],
+                         batch_size=args.batch_size, pages_per_task=args.pages_per_task,
+                         preprocess=args.preprocess)
+    start = time.perf_counter()
+    region_count = len(template['regions'])
+
+    def rows():
+        # 按页顺序产出，识别完成即写入Excel，无需在内存中保留全部结果
+        for done, row in enumerate(engine.iter_ordered(refs, template['regions'], reference), 1):
+            print(f"\r已识别 {done}/{len(refs)}", end='', flush=True)
+            yield row
+
+    errors = []
+    output_path = save_results(
+        guarded_rows(rows(), len(refs), lambda e: [f"识别失败: {str(e)}"] * region_count, errors),
+        file_info, region_count, output_path, template['field_names'])
+    elapsed = time.perf_counter() - start
+    print()
+    print(f"结果已保存至：{output_path}")
+    print(f"耗时 {elapsed:.1f} 秒，{len(refs) / elapsed if elapsed else 0:.2f} 页/秒")
+    print(f"各阶段耗时（所有进程累计）：{engine.timings.summary()}")
+    if args.metrics:
+        print(f"性能统计已导出：{metrics.export(args.metrics)}")
+    return report_failures(engine, errors)
+
+
+def run_routed(args, refs, file_info, output_path):
+    """混合版面：每页按缩略图指纹匹配模板，一次处理完所有页"""
+    index = TemplateIndex.from_directory(args.auto)
+    if not len(index):
+        print(f"模板目录 {args.auto} 中没有带参考图的模板（需在界面中保存模板）", file=sys.stderr)
+        return 1
+    names = '、'.join(t['name'] for t in index.templates())
+    print(f"共 {len(refs)} 页，自动匹配模板：{names}，{args.workers} 个进程")
+
+    engine = BatchEngine(workers=args.workers, dpi=args.dpi, batch_size=args.batch_size,
+                         pages_per_task=args.pages_per_task, preprocess=args.preprocess)
+    start = time.perf_counter()
+    counts = {}
+
+    def rows():
+        for done, row in enumerate(engine.iter_ordered(refs, None, template_dir=args.auto,
+                                                       align=not args.no_align), 1):
+            counts[row[0]] = counts.get(row[0], 0) + 1
+            print(f"\r已识别 {done}/{len(refs)}", end='', flush=True)
+            yield row
+
+    errors = []
+    output_path = save_results(
+        guarded_rows(rows(), len(refs), lambda e: [FAILED_TEMPLATE, f"识别失败: {str(e)}"], errors),
+        file_info, index.max_region_count(), output_path, headers=routed_headers(index.max_region_count()))
+    elapsed = time.perf_counter() - start
+    print()
+    print(f"结果已保存至：{output_path}")
+    print("各模板页数：" + '，'.join(f"{name} {n}" for name, n in counts.items()))
+    if counts.get(UNMATCHED_TEMPLATE):
+        print(f"有 {counts[UNMATCHED_TEMPLATE]} 页未匹配到模板，可为其保存新模板后重新运行")
+    print(f"耗时 {elapsed:.1f} 秒，{len(refs) / elapsed if elapsed else 0:.2f} 页/秒")
+    print(f"各阶段耗时（所有进程累计）：{engine.timings.summary()}")
+    if args.metrics:
+        print(f"性能统计已导出：{metrics.export(args.metrics)}")
+    return report_failures(engine, errors)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""模板对齐：在缩小的页面上做特征点匹配，估计每页相对模板参考页的偏移和缩放
+
+扫描件常有几毫米的平移或轻微缩放，直接套用模板坐标会截到空白或相邻字段。
+对齐只在 ALIGN_WIDTH 宽的灰度图上进行（ORB + RANSAC），单页耗时在几十毫秒以内；
+匹配点太少或估计结果超出合理范围时退回未对齐的模板坐标。
+"""
+import threading
+
+from PIL import Image
+
+from core import metrics
+
+
+ALIGN_WIDTH = 800
+MAX_FEATURES = 1500
+RATIO_TEST = 0.75
+MIN_INLIERS = 15
+# 只接受轻微的缩放和旋转，超出范围多半是误匹配（或根本不是同一种版面）
+SCALE_RANGE = (0.8, 1.25)
+MAX_ROTATION = 0.05  # 约 3 度
+
+
+def reference_image(img):
+    """缩小为对齐用的灰度参考图（随模板一起保存）"""
+    gray = img.convert('L')
+    if gray.width > ALIGN_WIDTH:
+        height = max(1, round(gray.height * ALIGN_WIDTH / gray.width))
+        gray = gray.resize((ALIGN_WIDTH, height), Image.Resampling.BILINEAR)
+    return gray
+
+
+def _to_array(img):
+    import numpy as np
+    return np.asarray(reference_image(img))
+
+
+class Alignment:
+    """参考图像素 → 页面缩小图像素的 2x3 仿射矩阵"""
+
+    def __init__(self, matrix, ref_size, page_size, inliers):
+        self.matrix = matrix
+        self.ref_size = ref_size
+        self.page_size = page_size
+        self.inliers = inliers
+
+    def map_point(self, u, v):
+        """模板归一化坐标 → 页面归一化坐标"""
+        x, y = u * self.ref_size[0], v * self.ref_size[1]
+        m = self.matrix
+        return ((m[0][0] * x + m[0][1] * y + m[0][2]) / self.page_size[0],
+                (m[1][0] * x + m[1][1] * y + m[1][2]) / self.page_size[1])
+
+    def map_regions(self, regions):
+        """变换四个角后取外接矩形，限制在页面内"""
+        mapped = []
+        for x0, y0, x1, y1 in regions:
+            corners = [self.map_point(u, v) for u in (x0, x1) for v in (y0, y1)]
+            xs = [min(max(x, 0.0), 1.0) for x, _ in corners]
+            ys = [min(max(y, 0.0), 1.0) for _, y in corners]
+            mapped.append((min(xs), min(ys), max(xs), max(ys)))
+        return mapped
+
+
+class PageAligner:
+    """对一张参考页预先提取特征点，之后每页只需提取该页特征并匹配（线程安全）"""
+
+    def __init__(self, reference):
+        import cv2
+        self._cv2 = cv2
+        if isinstance(reference, str):
+            with Image.open(reference) as img:
+                reference = img.copy()
+        ref = _to_array(reference)
+        self.ref_size = (ref.shape[1], ref.shape[0])
+        self._orb = cv2.ORB_create(MAX_FEATURES)
+        self._lock = threading.Lock()  # ORB 对象不保证线程安全
+        self._ref_keypoints, self._ref_descriptors = self._orb.detectAndCompute(ref, None)
+        self._matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+
+    def estimate(self, img):
+        """估计页面相对参考页的变换，失败时返回 None"""
+        import numpy as np
+        cv2 = self._cv2
+        if self._ref_descriptors is None or len(self._ref_keypoints) < MIN_INLIERS:
+            return None
+        with metrics.timer('align.estimate'):
+            page = _to_array(img)
+            with self._lock:
+                keypoints, descriptors = self._orb.detectAndCompute(page, None)
+            if descriptors is None or len(keypoints) < MIN_INLIERS:
+                return None
+            good = []
+            for pair in self._matcher.knnMatch(self._ref_descriptors, descriptors, k=2):
+                if len(pair) == 2 and pair[0].distance < RATIO_TEST * pair[1].distance:
+                    good.append(pair[0])
+            if len(good) < MIN_INLIERS:
+                return None
+            src = np.float32([self._ref_keypoints[m.queryIdx].pt for m in good])
+            dst = np.float32([keypoints[m.trainIdx].pt for m in good])
+            # 相似变换（平移 + 等比缩放 + 小角度旋转），比完整仿射更不容易被误匹配带偏
+            matrix, mask = cv2.estimateAffinePartial2D(src, dst, method=cv2.RANSAC,
+                                                       ransacReprojThreshold=3.0)
+        if matrix is None:
+            return None
+        inliers = int(mask.sum()) if mask is not None else 0
+        scale = float(np.hypot(matrix[0][0], matrix[1][0]))
+        rotation = abs(float(np.arctan2(matrix[1][0], matrix[0][0])))
+        # 参考图与页面缩小到相同宽度，同一版面的缩放应接近 1
+        if inliers < MIN_INLIERS or not SCALE_RANGE[0] <= scale <= SCALE_RANGE[1] \
+                or rotation > MAX_ROTATION:
+            return None
+        return Alignment(matrix.tolist(), self.ref_size, (page.shape[1], page.shape[0]), inliers)
+
+    def align_regions(self, img, regions):
+        """regions 为模板归一化坐标，返回该页上的归一化坐标（对齐失败时原样返回）"""
+        alignment = self.estimate(img)
+        metrics.incr('align.ok' if alignment is not None else 'align.fallback')
+        if alignment is None:
+            return list(regions)
+        return alignment.map_regions(regions)
+
+
+_aligners = {}
+_aligners_lock = threading.Lock()
+
+
+def get_aligner(reference_path):
+    """按参考图路径复用对齐器（参考图特征只提取一次）"""
+    with _aligners_lock:
+        aligner = _aligners.get(reference_path)
+        if aligner is None:
+            aligner = _aligners[reference_path] = PageAligner(reference_path)
+        return aligner
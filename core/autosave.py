@@ -0,0 +1,94 @@
+import json
+import os
+
+
+JOURNAL_NAME = "autosave_journal.jsonl"
+RECOVERY_NAME = "autosave_recovery.json"
+# 追加多少次后把日志压缩进恢复文件
+COMPACT_EVERY = 20
+
+
+class AutosaveJournal:
+    """增量自动保存：只把变化的行追加到日志（JSON Lines），定期压缩为单个滚动恢复文件
+
+    日志记录：
+        {"op": "headers", "values": [...]}
+        {"op": "row", "row": 行号, "values": [...]}
+        {"op": "rows", "count": 总行数}
+    恢复时先读恢复文件，再按顺序重放日志。
+    """
+
+    def __init__(self, directory=".", compact_every=COMPACT_EVERY):
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.recovery_path = os.path.join(directory, RECOVERY_NAME)
+        self.compact_every = compact_every
+        self._appends = 0
+
+    def has_data(self):
+        return os.path.exists(self.recovery_path) or os.path.exists(self.journal_path)
+
+    def record(self, headers, row_count, dirty_rows, get_row, structure_changed=False,
+               headers_changed=False):
+        """写入一次增量；行号错位（删除等）时直接压缩为完整快照"""
+        if structure_changed:
+            self.compact(headers, [get_row(r) for r in range(row_count)])
+            return
+
+        entries = []
+        if headers_changed:
+            entries.append({'op': 'headers', 'values': headers})
+        entries.extend({'op': 'row', 'row': r, 'values': get_row(r)} for r in dirty_rows)
+        entries.append({'op': 'rows', 'count': row_count})
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._appends += 1
+        if self._appends >= self.compact_every:
+            headers, rows = self.recover()
+            self.compact(headers, rows)
+
+    def compact(self, headers, rows):
+        """写出完整快照（先写临时文件再替换，避免中途崩溃损坏），并清空日志"""
+        tmp_path = self.recovery_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'headers': headers, 'rows': rows}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.recovery_path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._appends = 0
+
+    def recover(self):
+        """还原最近一次自动保存的 (表头, 行数据)"""
+        headers, rows = [], []
+        if os.path.exists(self.recovery_path):
+            with open(self.recovery_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            headers, rows = snapshot['headers'], snapshot['rows']
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # 最后一行可能在写入时中断
+                    if entry['op'] == 'headers':
+                        headers = entry['values']
+                    elif entry['op'] == 'row':
+                        while len(rows) <= entry['row']:
+                            rows.append([])
+                        rows[entry['row']] = entry['values']
+                    elif entry['op'] == 'rows':
+                        del rows[entry['count']:]
+        return headers, rows
+
+    def clear(self):
+        for path in (self.journal_path, self.recovery_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._appends = 0
@@ -0,0 +1,215 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+from core import metrics
+from core.alignment import get_aligner
+from core.engine_pool import configure_engine_pool, create_paddle_engine
+from core.page_source import PDF_DPI, render_page_rgb
+from core.pipeline import recognize_refs
+from core.preprocess import Preprocessor, StageTimings, PROFILE_AUTO
+from core.region_ocr import RegionRecognizer, DEFAULT_BATCH_SIZE
+from core.result_cache import get_result_cache
+from core.template_index import PageClassifier, get_template_index
+from core.text_layer import get_text_layer
+
+UNMATCHED_TEMPLATE = "未匹配"
+FAILED_TEMPLATE = "识别失败"
+
+
+def default_workers():
+    """默认进程数：每个 PaddleOCR 进程本身会用多个线程，按 4 核一个进程估算"""
+    return max(1, (os.cpu_count() or 1) // 4)
+
+
+# ---- 子进程侧：每个进程持有自己的预热引擎 ----
+_worker = {}
+
+
+def _init_worker(dpi, target_size, batch_size, cpu_threads, preprocess, metrics_enabled=False):
+    # spawn 出的子进程不继承主进程中 metrics.enable() 的设置
+    metrics.enable(metrics_enabled)
+    factory = partial(create_paddle_engine, cpu_threads=cpu_threads)
+    pool = configure_engine_pool(1, factory)
+    pool.warm_up()
+    _worker.update(
+        dpi=dpi,
+        target_size=target_size,
+        recognizer=RegionRecognizer(pool, batch_size=batch_size, use_cls=True),
+        cache=get_result_cache(),
+        text_layer=get_text_layer(),
+        preprocess=preprocess,
+    )
+
+
+def _load_page(ref):
+    return render_page_rgb(ref, _worker['dpi'], _worker['target_size'])
+
+
+def _process_chunk(chunk, regions, reference=None):
+    """子进程按页面引用自行读取文字层/渲染，只把识别文本、各阶段耗时和性能统计传回主进程
+
+    reference 为模板参考图路径，给出时每页先对齐区域再裁剪（参考图特征每个进程只提取一次）。
+    """
+    preprocessor = Preprocessor(_worker['preprocess'])
+    indexes = [index for index, _ in chunk]
+    refs = [ref for _, ref in chunk]
+    # 未指定统一尺寸时，区域坐标按 dpi 渲染出的原图计算
+    image_size = _worker['target_size']
+    text_layer = _worker['text_layer'] if image_size else None
+    aligner = get_aligner(reference) if reference else None
+    rows = recognize_refs(_worker['recognizer'], refs, regions, _load_page, image_size,
+                          preprocessor, _worker['cache'], text_layer, aligner)
+    return list(zip(indexes, rows)), preprocessor.timings.snapshot(), metrics.drain()
+
+
+def _process_routed_chunk(chunk, template_dir, align):
+    """按模板分流：先用缩略图指纹为每页选出模板，再按模板分组识别
+
+    返回的每行以模板名开头（未匹配的页只有 UNMATCHED_TEMPLATE 一列），各模板按自己的 image_size 渲染。
+    """
+    preprocessor = Preprocessor(_worker['preprocess'])
+    classifier = PageClassifier(get_template_index(template_dir))
+    groups = {}
+    for index, ref in chunk:
+        with preprocessor.timings.measure('classify'):
+            try:
+                template = classifier.classify(ref)
+            except Exception as e:
+                print(f"页面分类失败：{ref} {e}")
+                template = None
+        name = template['name'] if template else None
+        groups.setdefault(name, (template, []))[1].append((index, ref))
+
+    results = []
+    for name, (template, items) in groups.items():
+        if template is None:
+            results.extend((index, [UNMATCHED_TEMPLATE]) for index, _ in items)
+            continue
+        image_size = template['image_size']
+        aligner = get_aligner(template['reference']) if align and template['reference'] else None
+        rows = recognize_refs(_worker['recognizer'], [ref for _, ref in items], template['regions'],
+                              partial(render_page_rgb, dpi=_worker['dpi'], target_size=image_size),
+                              image_size, preprocessor, _worker['cache'], _worker['text_layer'], aligner)
+        results.extend((index, [name] + row) for (index, _), row in zip(items, rows))
+    return results, preprocessor.timings.snapshot(), metrics.drain()
+
+
+# ---- 主进程侧 ----
+class BatchEngine:
+    """多进程批量识别：页面以 (path, page) 引用分发给进程池，结果经进度队列返回
+
+    队列消息：('result', index, row)、('done', 总页数, 耗时) 或 ('error', 信息)
+    """
+
+    def __init__(self, workers=None, dpi=PDF_DPI, target_size=None,
+                 batch_size=DEFAULT_BATCH_SIZE, pages_per_task=2, preprocess=PROFILE_AUTO):
+        self.workers = max(1, int(workers or default_workers()))
+        self.dpi = dpi
+        self.target_size = target_size
+        self.batch_size = batch_size
+        self.pages_per_task = max(1, int(pages_per_task))
+        self.preprocess = preprocess
+        self.timings = StageTimings()  # 汇总所有子进程的各阶段耗时
+        self.failed_pages = 0  # 任务失败、只写入了失败标记的页数
+        self.progress_queue = queue.Queue()
+        self._executor = None
+        self._thread = None
+        self._cancelled = threading.Event()
+
+    def _create_executor(self):
+        cpu_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        # 使用 spawn，避免 fork 继承父进程中已加载的 Paddle 状态
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.dpi, self.target_size, self.batch_size, cpu_threads, self.preprocess,
+                      metrics.enabled()),
+        )
+
+    def _chunks(self, refs):
+        items = list(enumerate(refs))
+        for start in range(0, len(items), self.pages_per_task):
+            yield items[start:start + self.pages_per_task]
+
+    def iter_results(self, refs, regions, reference=None, template_dir=None, align=True):
+        """阻塞地执行，按完成顺序产出 (index, row)，供命令行等非界面场景使用
+
+        给出 template_dir 时忽略 regions/reference，每页自动匹配模板目录中的模板，row 以模板名开头。
+        """
+        self.failed_pages = 0
+        self._executor = self._create_executor()
+        try:
+            if template_dir:
+                futures = {self._executor.submit(_process_routed_chunk, chunk, template_dir, align): chunk
+                           for chunk in self._chunks(refs)}
+            else:
+                futures = {self._executor.submit(_process_chunk, chunk, list(regions), reference): chunk
+                           for chunk in self._chunks(refs)}
+            for future in as_completed(futures):
+                if self._cancelled.is_set():
+                    break
+                try:
+                    rows, timings, worker_metrics = future.result()
+                except Exception as e:
+                    # 单个任务失败（渲染/对齐异常、子进程崩溃等）只把该任务的页标记为失败，其余页照常输出
+                    print(f"识别任务失败：{str(e)}")
+                    failed = [index for index, _ in futures[future]]
+                    self.failed_pages += len(failed)
+                    metrics.incr('batch.failed_pages', len(failed))
+                    row = self._failure_row(e, regions, template_dir)
+                    rows, timings, worker_metrics = [(index, list(row)) for index in failed], {}, {}
+                self.timings.merge(timings)
+                metrics.merge(worker_metrics)
+                for index, row in rows:
+                    yield index, row
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def _failure_row(error, regions, template_dir):
+        message = f"识别失败: {str(error)}"
+        if template_dir:
+            return [FAILED_TEMPLATE, message]
+        return [message] * max(1, len(regions))
+
+    def iter_ordered(self, refs, regions, reference=None, template_dir=None, align=True):
+        """按页面顺序产出 row：提前完成的页暂存，等前面的页完成后再输出，便于流式写入"""
+        pending = {}
+        next_index = 0
+        for index, row in self.iter_results(refs, regions, reference, template_dir, align):
+            pending[index] = row
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+
+    def start(self, refs, regions, reference=None, template_dir=None, align=True):
+        """后台运行，结果写入 progress_queue，界面线程轮询该队列"""
+        refs = list(refs)
+
+        def run():
+            start = time.perf_counter()
+            try:
+                for index, row in self.iter_results(refs, regions, reference, template_dir, align):
+                    self.progress_queue.put(('result', index, row))
+                if not self._cancelled.is_set():
+                    self.progress_queue.put(('done', len(refs), time.perf_counter() - start))
+            except Exception as e:
+                self.progress_queue.put(('error', str(e)))
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
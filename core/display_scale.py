@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+
+# 拖动窗口时用快速插值，窗口稳定后再用高质量插值重绘
+FAST_RESAMPLE = Image.Resampling.BILINEAR
+QUALITY_RESAMPLE = Image.Resampling.LANCZOS
+SETTLE_DELAY_MS = 150
+MAX_SCALED_ENTRIES = 8
+
+
+class ScaledImageCache:
+    """按 (页面, 目标尺寸, 插值方式) 缓存缩放后的显示图像，重绘区域或来回调整窗口时直接复用"""
+
+    def __init__(self, max_entries=MAX_SCALED_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, img, size, fast=False):
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        if size == img.size:
+            return img
+        quality_key = (key, size, QUALITY_RESAMPLE)
+        with self._lock:
+            # 已有高质量版本时，快速模式也直接使用
+            scaled = self._entries.get(quality_key)
+            cache_key = quality_key
+            if scaled is None and fast:
+                cache_key = (key, size, FAST_RESAMPLE)
+                scaled = self._entries.get(cache_key)
+            if scaled is not None:
+                self._entries.move_to_end(cache_key)
+                return scaled
+
+        resample = FAST_RESAMPLE if fast else QUALITY_RESAMPLE
+        scaled = img.resize(size, resample)
+        with self._lock:
+            self._entries[(key, size, resample)] = scaled
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return scaled
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class Debouncer:
+    """Tk 事件防抖：连续触发时只在最后一次之后 delay_ms 毫秒执行一次回调"""
+
+    def __init__(self, widget, callback, delay_ms=SETTLE_DELAY_MS):
+        self.widget = widget
+        self.callback = callback
+        self.delay_ms = delay_ms
+        self._after_id = None
+
+    def trigger(self):
+        self.cancel()
+        self._after_id = self.widget.after(self.delay_ms, self._fire)
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _fire(self):
+        self._after_id = None
+        self.callback()
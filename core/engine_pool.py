@@ -0,0 +1,193 @@
+import importlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+MODEL_DIR = "ocrModel"
+# 池大小可通过环境变量配置，默认单引擎（PaddleOCR 单实例已占用数百MB内存）
+DEFAULT_POOL_SIZE = int(os.environ.get("OCR_POOL_SIZE", "1"))
+# 界面启动后延迟多久开始后台预热（毫秒），先让窗口完成首次绘制
+WARM_UP_DELAY_MS = int(os.environ.get("OCR_WARM_UP_DELAY_MS", "300"))
+
+
+def default_engine_kwargs():
+    """与原先各处构造 PaddleOCR 时一致的参数"""
+    return dict(
+        use_gpu=False,
+        cls_model_dir=os.path.join(MODEL_DIR, "cls", "ch"),
+        det_model_dir=os.path.join(MODEL_DIR, "det", "ch"),
+        rec_model_dir=os.path.join(MODEL_DIR, "rec", "ch"),
+        use_angle_cls=True,
+        lang='ch',
+    )
+
+
+def create_paddle_engine(**overrides):
+    """构造 PaddleOCR 实例，overrides 可覆盖默认参数（如 cpu_threads）"""
+    from paddleocr import PaddleOCR
+    kwargs = default_engine_kwargs()
+    kwargs.update(overrides)
+    return PaddleOCR(**kwargs)
+
+
+class _PooledEngine:
+    """池中的单个引擎，PaddleOCR 预测器不是线程安全的，每个引擎独占一把锁"""
+
+    def __init__(self, index, ocr, load_time):
+        self.index = index
+        self.ocr = ocr
+        self.lock = threading.Lock()
+        self.load_time = load_time
+        self.uses = 0
+
+
+class OCREnginePool:
+    """进程内共享的 PaddleOCR 引擎池：按需懒加载，加载后重复使用"""
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, engine_factory=None):
+        self.size = max(1, int(size))
+        self._factory = engine_factory or create_paddle_engine
+        self._engines = []
+        self._loading = 0
+        self._cond = threading.Condition()
+        self._acquisitions = 0
+        self._reuses = 0
+        self._wait_time = 0.0
+
+    def _try_lock_idle(self):
+        for engine in self._engines:
+            if engine.lock.acquire(blocking=False):
+                return engine
+        return None
+
+    def _load_engine(self):
+        start = time.perf_counter()
+        try:
+            ocr = self._factory()
+        except Exception:
+            with self._cond:
+                self._loading -= 1
+                self._cond.notify_all()
+            raise
+        load_time = time.perf_counter() - start
+        with self._cond:
+            engine = _PooledEngine(len(self._engines), ocr, load_time)
+            engine.lock.acquire()
+            self._engines.append(engine)
+            self._loading -= 1
+        return engine
+
+    def _checkout(self, timeout=None):
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        with self._cond:
+            while True:
+                engine = self._try_lock_idle()
+                if engine is not None:
+                    reused = True
+                    break
+                if len(self._engines) + self._loading < self.size:
+                    # 池未满：在锁外加载新引擎，避免阻塞其他线程归还引擎
+                    self._loading += 1
+                    engine = None
+                    reused = False
+                    break
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("等待OCR引擎超时")
+                self._cond.wait(remaining)
+
+        if engine is None:
+            engine = self._load_engine()
+
+        with self._cond:
+            self._acquisitions += 1
+            if reused:
+                self._reuses += 1
+            self._wait_time += time.perf_counter() - start
+            engine.uses += 1
+        return engine
+
+    def _checkin(self, engine):
+        with self._cond:
+            engine.lock.release()
+            self._cond.notify()
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """独占地借用一个引擎：with pool.acquire() as ocr: ocr.ocr(...)"""
+        engine = self._checkout(timeout)
+        try:
+            yield engine.ocr
+        finally:
+            self._checkin(engine)
+
+    def warm_up(self, count=1):
+        """预先加载引擎（阻塞），已加载的不会重复加载"""
+        engines = []
+        try:
+            for _ in range(min(count, self.size)):
+                with self._cond:
+                    if len(self._engines) + self._loading >= max(count, 1):
+                        break
+                    self._loading += 1
+                engines.append(self._load_engine())
+        finally:
+            for engine in engines:
+                self._checkin(engine)
+
+    def warm_up_async(self, count=1, modules=()):
+        """在后台线程预热，不阻塞界面；modules 为识别时才用到的模块，顺带提前导入"""
+        def run():
+            for name in modules:
+                try:
+                    importlib.import_module(name)
+                except Exception as e:
+                    print(f"预加载模块失败：{name} {e}")
+            self.warm_up(count)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def metrics(self):
+        """加载耗时与复用次数统计"""
+        with self._cond:
+            load_times = [engine.load_time for engine in self._engines]
+            return {
+                'pool_size': self.size,
+                'loaded_engines': len(self._engines),
+                'load_times': load_times,
+                'total_load_time': sum(load_times),
+                'acquisitions': self._acquisitions,
+                'reuses': self._reuses,
+                'total_wait_time': self._wait_time,
+                'uses_per_engine': [engine.uses for engine in self._engines],
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_engine_pool():
+    """获取进程级共享引擎池（首次调用时创建，但不立即加载模型）"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OCREnginePool()
+        return _pool
+
+
+def configure_engine_pool(size=None, engine_factory=None):
+    """在首次使用前配置共享引擎池，例如命令行指定的池大小"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.metrics()['loaded_engines']:
+            if size is not None:
+                _pool.size = max(_pool.size, int(size))
+            return _pool
+        _pool = OCREnginePool(size if size is not None else DEFAULT_POOL_SIZE, engine_factory)
+        return _pool
@@ -0,0 +1,131 @@
+import os
+
+from core import metrics
+
+
+SHEET_NAME = '识别结果'
+COLUMN_WIDTH = 25
+BODY_STYLE = '识别结果正文'
+
+
+def result_headers(region_count, field_names=None):
+    names = list(field_names or [])[:region_count]
+    names += [f"区域{i + 1}" for i in range(len(names), region_count)]
+    return ["文件名", "文件路径", "页码"] + names
+
+
+def routed_headers(region_count):
+    """按模板分流时的表头：文件信息 + 模板名 + 区域（各模板区域数不同，取最大值）"""
+    return result_headers(0) + ["模板"] + [f"区域{i + 1}" for i in range(region_count)]
+
+
+def result_row(info, row):
+    """识别结果前加上文件信息列"""
+    return [
+        info.get('filename', '未知文件'),
+        info.get('filepath', '未知路径'),
+        info.get('page', 'N/A'),
+        *row
+    ]
+
+
+def normalize_output_path(output_path):
+    """校验并规范输出路径（长度、扩展名、父目录）"""
+    # 验证路径长度
+    if len(output_path) > 200:
+        raise ValueError("文件路径超过Windows系统限制")
+
+    # 强制添加正确扩展名
+    if not output_path.lower().endswith('.xlsx'):
+        output_path += '.xlsx'
+
+    # 使用绝对路径并创建父目录
+    output_path = os.path.abspath(output_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    return output_path
+
+
+class StreamingExcelWriter:
+    """基于 openpyxl 只写模式的流式导出：逐行写入磁盘，内存占用与行数无关
+
+    样式对象只创建一次：表头单独设置，正文统一使用一个命名样式（自动换行、顶端对齐）。
+    """
+
+    def __init__(self, output_path, headers, styled=True):
+        # openpyxl 导入较慢，首次导出时才加载，不拖慢界面启动
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Alignment, PatternFill, NamedStyle
+        from openpyxl.utils import get_column_letter
+
+        self._cell_type = WriteOnlyCell
+        self.output_path = normalize_output_path(output_path)
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(SHEET_NAME)
+        self.styled = styled
+        self.rows_written = 0
+
+        if styled:
+            self.workbook.add_named_style(NamedStyle(
+                name=BODY_STYLE, alignment=Alignment(wrap_text=True, vertical='top')))
+            # 列宽在写入任何行之前设置
+            for col in range(1, len(headers) + 1):
+                self.sheet.column_dimensions[get_column_letter(col)].width = COLUMN_WIDTH
+            header_font = Font(bold=True, color="FFFFFF")
+            header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+            header_cells = []
+            for name in headers:
+                cell = WriteOnlyCell(self.sheet, value=name)
+                cell.font = header_font
+                cell.fill = header_fill
+                header_cells.append(cell)
+            self.sheet.append(header_cells)
+        else:
+            self.sheet.append(list(headers))
+
+    def write_row(self, values):
+        if self.styled:
+            cells = []
+            for value in values:
+                cell = self._cell_type(self.sheet, value=value)
+                cell.style = BODY_STYLE
+                cells.append(cell)
+            self.sheet.append(cells)
+        else:
+            self.sheet.append(list(values))
+        self.rows_written += 1
+
+    def write_rows(self, rows):
+        """rows 可以是生成器，识别完成一行就写入一行"""
+        for values in rows:
+            self.write_row(values)
+
+    def close(self):
+        with metrics.timer('excel.save'):
+            self.workbook.save(self.output_path)
+        metrics.incr('excel.rows', self.rows_written)
+        return self.output_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+def save_results(data, file_info, region_count, output_path, field_names=None, headers=None):
+    """把识别结果写入带格式的Excel，返回实际保存路径；data 可为按页顺序产出的生成器"""
+    headers = headers or result_headers(region_count, field_names)
+    with StreamingExcelWriter(output_path, headers) as writer:
+        for idx, row in enumerate(data):
+            info = file_info[idx] if idx < len(file_info) else {}
+            writer.write_row(result_row(info, row))
+    return writer.output_path
+
+
+def write_table(output_path, headers, rows):
+    """导出普通表格（无格式），rows 可为生成器"""
+    with StreamingExcelWriter(output_path, headers, styled=False) as writer:
+        writer.write_rows(rows)
+    return writer.output_path
@@ -0,0 +1,266 @@
+"""轻量的性能统计：计时器、计数器、直方图
+
+默认关闭（环境变量 OCR_METRICS=1 或调用 enable() 开启）。关闭时 timer() 返回共享的空上下文，
+incr()/observe() 只做一次布尔判断，几乎没有开销。
+
+    from core import metrics
+    with metrics.timer('render.page'):
+        ...
+    metrics.incr('cache.hit', 3)
+    metrics.export_json('metrics.json')
+"""
+import csv
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+# 耗时直方图桶上界（秒）：1ms 起按 2 倍递增，约到 9 分钟
+TIME_BUCKETS = tuple(0.001 * 2 ** i for i in range(20))
+# 数值直方图桶上界：1 起按 2 倍递增
+VALUE_BUCKETS = tuple(float(2 ** i) for i in range(21))
+
+KIND_TIMER = 'timer'
+KIND_COUNTER = 'counter'
+KIND_HISTOGRAM = 'histogram'
+
+_enabled = os.environ.get("OCR_METRICS", "0") == "1"
+
+
+class Histogram:
+    """固定桶直方图，记录次数、总和、最值，百分位数按桶上界估算"""
+
+    def __init__(self, kind, buckets):
+        self.kind = kind
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value, count=1):
+        """count > 1 表示已汇总的多次记录（如子进程传回的累计耗时），只计入次数与总和"""
+        self.count += count
+        self.total += value
+        if count != 1:
+            return
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, stats):
+        """并入另一处的统计摘要（子进程传回的 snapshot），桶分布无法还原，只合并次数、总和与最值"""
+        self.count += stats['count']
+        self.total += stats['total']
+        for attr, pick in (('min', min), ('max', max)):
+            value = stats.get(attr)
+            if value is not None:
+                current = getattr(self, attr)
+                setattr(self, attr, value if current is None else pick(current, value))
+
+    def percentile(self, pct):
+        observed = sum(self.counts)
+        if not observed:
+            return None
+        target = observed * pct / 100
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'kind': self.kind,
+            'count': self.count,
+            'total': round(self.total, 6),
+            'mean': round(self.total / self.count, 6) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self.started_at = time.time()
+
+    def _histogram(self, name, kind, buckets):
+        hist = self._histograms.get(name)
+        if hist is None:
+            hist = self._histograms[name] = Histogram(kind, buckets)
+        return hist
+
+    def record_time(self, name, seconds, count=1):
+        with self._lock:
+            self._histogram(name, KIND_TIMER, TIME_BUCKETS).add(seconds, count)
+
+    def observe(self, name, value):
+        with self._lock:
+            self._histogram(name, KIND_HISTOGRAM, VALUE_BUCKETS).add(float(value))
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def merge(self, data):
+        with self._lock:
+            for name, stats in data.items():
+                if stats['kind'] == KIND_COUNTER:
+                    self._counters[name] = self._counters.get(name, 0) + stats['count']
+                else:
+                    buckets = TIME_BUCKETS if stats['kind'] == KIND_TIMER else VALUE_BUCKETS
+                    self._histogram(name, stats['kind'], buckets).merge(stats)
+
+    def _collect(self):
+        data = {name: {'kind': KIND_COUNTER, 'count': value}
+                for name, value in self._counters.items()}
+        data.update((name, hist.summary()) for name, hist in self._histograms.items())
+        return dict(sorted(data.items()))
+
+    def snapshot(self):
+        """{名称: 统计字典}，按名称排序"""
+        with self._lock:
+            return self._collect()
+
+    def drain(self):
+        """取出当前统计并清空（同一把锁内完成，不会漏掉并发的记录）"""
+        with self._lock:
+            data = self._collect()
+            self._counters.clear()
+            self._histograms.clear()
+        return data
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _registry.record_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_registry = MetricsRegistry()
+_NULL_TIMER = _NullTimer()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def timer(name):
+    """计时上下文：with metrics.timer('stage'): ..."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def record_time(name, seconds, count=1):
+    if _enabled:
+        _registry.record_time(name, seconds, count)
+
+
+def incr(name, n=1):
+    if _enabled:
+        _registry.incr(name, n)
+
+
+def observe(name, value):
+    if _enabled:
+        _registry.observe(name, value)
+
+
+def merge(data):
+    """并入 snapshot() 格式的统计（批量识别子进程传回的数据）"""
+    if _enabled and data:
+        _registry.merge(data)
+
+
+def snapshot():
+    return _registry.snapshot()
+
+
+def drain():
+    """取出当前统计并清空，子进程每个任务结束时调用，传回主进程的只是该任务的增量"""
+    return _registry.drain() if _enabled else {}
+
+
+def reset():
+    _registry.reset()
+
+
+def summary_lines():
+    """便于直接显示的文本摘要"""
+    lines = []
+    for name, stats in snapshot().items():
+        if stats['kind'] == KIND_COUNTER:
+            lines.append(f"{name}: {stats['count']}")
+        elif stats['kind'] == KIND_TIMER:
+            p95 = f"{stats['p95'] * 1000:.0f}ms" if stats['p95'] is not None else "-"
+            lines.append(f"{name}: {stats['count']}次 共{stats['total']:.2f}s "
+                         f"平均{(stats['mean'] or 0) * 1000:.1f}ms p95≤{p95}")
+        else:
+            lines.append(f"{name}: {stats['count']}次 平均{stats['mean'] or 0:.1f} 最大{stats['max']}")
+    return lines
+
+
+def export_json(path):
+    data = {
+        'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(_registry.started_at)),
+        'metrics': snapshot(),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+CSV_FIELDS = ['name', 'kind', 'count', 'total', 'mean', 'min', 'max', 'p50', 'p95']
+
+
+def export_csv(path):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for name, stats in snapshot().items():
+            writer.writerow({'name': name, **stats})
+    return path
+
+
+def export(path):
+    """按扩展名导出为 CSV 或 JSON"""
+    return export_csv(path) if path.lower().endswith('.csv') else export_json(path)
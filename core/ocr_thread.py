@@ -1,67 +1,159 @@
 from PyQt5.QtCore import QThread, pyqtSignal
+import time
 import traceback
-import numpy as np
-from paddleocr import paddleocr
+from core import metrics
+from core.region_extract import PageRegions
+from core.region_ocr import RegionRecognizer, RecognitionCancelled, DEFAULT_BATCH_SIZE
+from core.result_cache import get_result_cache
+from core.text_layer import get_text_layer
 
 
 class OCRThread(QThread):
     finished = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
+    region_done = pyqtSignal(int, str, str)  # 区域序号, 字段名, 文本
+    progress = pyqtSignal(int, int)  # 已完成区域数, 区域总数
+    cancelled = pyqtSignal()
 
-    def __init__(self,regions, image, field_names):
+    def __init__(self,regions, image, field_names, batch_size=DEFAULT_BATCH_SIZE, single_line=None,
+                 ref=None, image_size=None):
+        """image 可为页面图像，或返回页面图像的函数（仅在确实需要 OCR 时才调用）；
+        传入 ref（PageRef）时先尝试从 PDF 文字层直接取文字，regions 以 image_size 为坐标系"""
         super().__init__()
-        self.ocr = paddleocr.PaddleOCR(use_gpu=False,cls_model_dir=".\ocrModel\cls\ch",det_model_dir=".\ocrModel\det\ch",rec_model_dir=".\ocrModel\\rec\ch",use_angle_cls=True, lang='ch')
+        # 共享引擎池 + 批量识别，所有区域尽量合并为一次识别调用
+        self.recognizer = RegionRecognizer(batch_size=batch_size, use_cls=False)
+        self.single_line = single_line
+        self.result_cache = get_result_cache()
         self.regions = regions
-        self.image = image.copy()  # 使用图像副本
+        self.image = image  # 缓存中的页面只读使用，无需整页复制
+        self.image_size = image_size or (None if callable(image) else image.size)
+        self.ref = ref
+        self.text_layer = get_text_layer() if ref is not None and self.image_size else None
         self.field_names = field_names
+        self._cancelled = False
 
+    def cancel(self):
+        """请求取消：在下一个区域/批次之前停止，不再发出 finished"""
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
 
     def run(self):
+        start = time.perf_counter()
         try:
-            results = []
-            for region, name in zip(self.regions, self.field_names):
+            self.results = [None] * len(self.field_names)
+            self._done = 0
+            valid = []
+            for idx, region in enumerate(self.regions):
                 # 增加区域有效性验证
                 if not self._validate_region(region):
-                    results.append((name, "无效区域"))
-                    continue
-
-                # 精确裁剪并转换为RGB
-                cropped = self._crop_image(region)
-                if cropped is None:
-                    results.append((name, "裁剪失败"))
+                    self._set_result(idx, "无效区域")
                     continue
+                valid.append(idx)
 
-                # 确保图像格式正确
-                if cropped.mode != "RGB":
-                    cropped = cropped.convert("RGB")
-
-                # 执行OCR识别
-                text = self._recognize_text(cropped)
-                results.append((name, text))
+            # 电子版 PDF：区域内有文字层的直接取文字，不再 OCR
+            if self.text_layer is not None and valid:
+                texts = self.text_layer.extract(self.ref, [self.regions[i] for i in valid], self.image_size)
+                for idx, lines in zip(valid, texts):
+                    if lines:
+                        self._set_result(idx, '\n'.join(lines))
+                        metrics.incr('ocr_thread.text_layer_regions')
+            pending = [idx for idx in valid if self.results[idx] is None]
+            if pending:
+                self._check_cancelled()
+                with metrics.timer('ocr_thread.load_image'):
+                    image = self.image() if callable(self.image) else self.image
+                self._check_cancelled()
+                self._recognize_pending(image, pending)
 
-            self.finished.emit(results)
+            self._check_cancelled()
+            metrics.record_time('ocr_thread.job', time.perf_counter() - start)
+            self.finished.emit(list(zip(self.field_names, self.results)))
+        except RecognitionCancelled:
+            metrics.incr('ocr_thread.cancelled')
+            self.cancelled.emit()
         except Exception as e:
+            metrics.incr('ocr_thread.errors')
             self.error_occurred.emit(traceback.format_exc())
 
+    def _check_cancelled(self):
+        if self._cancelled:
+            raise RecognitionCancelled()
+
+    def _set_result(self, idx, text):
+        """记录一个区域的结果并立即通知界面"""
+        self.results[idx] = text
+        self._done += 1
+        name = self.field_names[idx] if idx < len(self.field_names) else ""
+        self.region_done.emit(idx, name, text)
+        self.progress.emit(self._done, len(self.regions))
+
+    def _recognize_pending(self, image, pending):
+        scale_x, scale_y = self._region_scale(image)
+        self.page = PageRegions(image)
+        crops, crop_slots = [], []
+        for idx in pending:
+            x1, y1, x2, y2 = self.regions[idx]
+            region = (x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y)
+
+            # 精确裁剪（RGB，仅复制区域像素）
+            cropped = self._crop_image(region)
+            if cropped is None:
+                self._set_result(idx, "裁剪失败")
+                continue
+
+            crops.append(cropped)
+            crop_slots.append(idx)
+
+        # 执行OCR识别（批量调用，每个区域完成时即时通知）
+        self._recognize_text(crops, crop_slots)
+
+    def _region_scale(self, image):
+        """实际加载的图像与 image_size 不一致时（如预估尺寸有取整误差）换算区域坐标"""
+        if not self.image_size:
+            return 1.0, 1.0
+        return image.width / self.image_size[0], image.height / self.image_size[1]
+
     def _validate_region(self, region):
         x1, y1, x2, y2 = region
         return x2 > x1 and y2 > y1 and (x2 - x1) >= 5 and (y2 - y1) >= 5
 
     def _crop_image(self, region):
         try:
-            x1, y1, x2, y2 = map(int, region)
-            # 添加边界检查
-            x1 = max(0, min(x1, self.image.width - 1))
-            y1 = max(0, min(y1, self.image.height - 1))
-            x2 = max(x1 + 1, min(x2, self.image.width))
-            y2 = max(y1 + 1, min(y2, self.image.height))
-            return self.image.crop((x1, y1, x2, y2))
+            # 边界检查在 PageRegions.clamp 中完成
+            return self.page.rgb(region)
         except Exception as e:
             return None  # 返回空值由后续处理
 
-    def _recognize_text(self, image):
+    def _recognize_text(self, crops, slots):
+        if not crops:
+            return
+        single_line = self.single_line
+        if isinstance(single_line, list):
+            flags = [single_line[i] if i < len(single_line) else None for i in slots]
+        else:
+            flags = [single_line] * len(crops)
+
+        def report(i, lines):
+            self._set_result(slots[i], '\n'.join(lines))
+
+        def compute(indexes):
+            return self.recognizer.recognize(
+                [crops[i] for i in indexes], [flags[i] for i in indexes],
+                on_region=lambda j, lines: report(indexes[j], lines),
+                cancelled=self.is_cancelled)
+
         try:
-            result = self.ocr.ocr(np.array(image), cls=False)
-            return '\n'.join([line[1][0] for line in result[0]]) if result else ''
+            # 先查结果缓存，区域与参数都没变时不再重复识别
+            if self.result_cache is not None:
+                settings = [self.recognizer.settings_tag(flag) for flag in flags]
+                self.result_cache.recognize(crops, settings, compute, on_cached=report)
+            else:
+                compute(list(range(len(crops))))
+        except RecognitionCancelled:
+            raise
         except Exception as e:
-            return f"识别错误: {str(e)}"
\ No newline at end of file
+            for idx in slots:
+                if self.results[idx] is None:
+                    self._set_result(idx, f"识别错误: {str(e)}")
@@ -0,0 +1,90 @@
+import itertools
+import threading
+import time
+
+
+class LatestRequestWorker:
+    """单个后台识别线程，请求队列只保留最新一项
+
+    新请求会取代尚未开始的旧请求；正在执行的旧请求无法中断，但完成后结果被丢弃，
+    不会回调。handler(payload) 在后台线程执行，
+    on_result(request_id, result, latency) / on_error(request_id, exc) 也在后台线程调用，
+    界面程序需自行切回界面线程。
+    """
+
+    def __init__(self, handler, on_result, on_error=None, name='ocr-worker'):
+        self.handler = handler
+        self.on_result = on_result
+        self.on_error = on_error
+        self.name = name
+        self.superseded = 0  # 被新请求取代或取消的请求数
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._pending = None  # (request_id, payload, submitted_at)
+        self._running_id = None
+        self._latest_id = 0
+        self._stopped = False
+        self._thread = None
+
+    def submit(self, payload):
+        """提交请求，返回请求编号"""
+        with self._cond:
+            request_id = next(self._ids)
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = (request_id, payload, time.perf_counter())
+            self._latest_id = request_id
+            self._cond.notify()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return request_id
+
+    def cancel(self):
+        """丢弃排队中的请求，正在执行的请求完成后也不再回调"""
+        with self._cond:
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = None
+            self._latest_id = next(self._ids)
+
+    def depth(self):
+        """排队中 + 正在执行的请求数"""
+        with self._cond:
+            return (self._pending is not None) + (self._running_id is not None)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending = None
+            self._cond.notify()
+
+    def _is_current(self, request_id):
+        with self._cond:
+            return request_id == self._latest_id
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                request_id, payload, submitted_at = self._pending
+                self._pending = None
+                self._running_id = request_id
+
+            try:
+                result = self.handler(payload)
+            except Exception as e:
+                if self.on_error and self._is_current(request_id):
+                    self.on_error(request_id, e)
+            else:
+                if self._is_current(request_id):
+                    self.on_result(request_id, result, time.perf_counter() - submitted_at)
+                else:
+                    with self._cond:
+                        self.superseded += 1
+            finally:
+                with self._cond:
+                    self._running_id = None
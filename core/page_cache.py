@@ -0,0 +1,152 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from core import metrics
+from core.page_source import render_page, render_page_rgb, is_pdf, PDF_DPI
+from core.text_layer import get_text_layer
+
+
+PREVIEW_DPI = 100
+PREVIEW_MAX_SIZE = (1200, 1200)
+# 缓存字节预算，可通过环境变量调整（MB）
+DEFAULT_MAX_BYTES = int(os.environ.get("PAGE_CACHE_MB", "512")) * 1024 * 1024
+
+TIER_PREVIEW = 'preview'
+TIER_FULL = 'full'
+
+
+def image_nbytes(img):
+    """估算解码后图像占用的字节数"""
+    return img.width * img.height * len(img.getbands())
+
+
+def _fit_size(size, max_size):
+    ratio = min(max_size[0] / size[0], max_size[1] / size[1], 1.0)
+    return max(1, int(size[0] * ratio)), max(1, int(size[1] * ratio))
+
+
+class PageCache:
+    """按 (path, page, dpi) 缓存页面图像的 LRU 缓存，超出字节预算时淘汰最久未用的页
+
+    分两级：preview 为低分辨率预览（界面显示），full 为原始分辨率（仅在识别前加载）。
+    target_size 不为空时，full 层统一缩放到该尺寸（如批量识别使用的 1600x1200）。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, dpi=PDF_DPI, target_size=None,
+                 preview_dpi=PREVIEW_DPI, preview_size=PREVIEW_MAX_SIZE):
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self.target_size = target_size
+        self.preview_dpi = preview_dpi
+        self.preview_size = preview_size
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, ref, tier):
+        dpi = self.preview_dpi if tier == TIER_PREVIEW else self.dpi
+        return ref.path, ref.page, dpi, tier
+
+    def _lookup(self, key):
+        with self._lock:
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if metrics.enabled():
+            metrics.incr(f'page_cache.{key[3]}.{"hit" if img is not None else "miss"}')
+        return img
+
+    def _store(self, key, img):
+        size = image_nbytes(img)
+        if size > self.max_bytes:
+            return img  # 单页超出预算时不缓存
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= image_nbytes(old)
+            self._entries[key] = img
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= image_nbytes(evicted)
+                self.evictions += 1
+        return img
+
+    def _render_full(self, ref):
+        return render_page_rgb(ref, dpi=self.dpi, target_size=self.target_size)
+
+    def _render_preview(self, ref):
+        full = self.peek(ref, TIER_FULL)
+        if full is None:
+            # PDF 直接以低 dpi 渲染预览，避免为了显示而解码整页
+            if is_pdf(ref.path):
+                full = render_page(ref, dpi=self.preview_dpi)
+            else:
+                full = render_page(ref)
+            if full.mode != 'RGB':
+                full = full.convert('RGB')
+        base_size = self.target_size or full.size
+        return full.resize(_fit_size(base_size, self.preview_size), Image.Resampling.BILINEAR)
+
+    def peek(self, ref, tier):
+        """只查缓存，不触发渲染"""
+        with self._lock:
+            return self._entries.get(self._key(ref, tier))
+
+    def get_preview(self, ref):
+        key = self._key(ref, TIER_PREVIEW)
+        img = self._lookup(key)
+        if img is None:
+            img = self._store(key, self._render_preview(ref))
+        return img
+
+    def get_full(self, ref):
+        key = self._key(ref, TIER_FULL)
+        img = self._lookup(key)
+        if img is None:
+            img = self._store(key, self._render_full(ref))
+        return img
+
+    def full_size(self, ref):
+        """原图尺寸：尽量通过文字层页面尺寸或图片文件头获得，不触发整页渲染"""
+        if self.target_size:
+            return tuple(self.target_size)
+        full = self.peek(ref, TIER_FULL)
+        if full is not None:
+            return full.size
+        if is_pdf(ref.path):
+            text_layer = get_text_layer()
+            size = text_layer.page_size(ref) if text_layer else None
+            if size:
+                return math.ceil(size[0] * self.dpi / 72), math.ceil(size[1] * self.dpi / 72)
+        else:
+            with Image.open(ref.path) as img:
+                return img.size
+        return self.get_full(ref).size
+
+    def discard(self, path=None):
+        """移除某个文件（或全部）的缓存页"""
+        with self._lock:
+            for key in [k for k in self._entries if path is None or k[0] == path]:
+                self.current_bytes -= image_nbytes(self._entries.pop(key))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,91 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from core.page_source import iter_page_refs
+from core.thumbnails import ThumbnailStore
+
+
+DEFAULT_THUMB_WORKERS = int(os.environ.get("THUMB_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+class PageLoaderThread(QThread):
+    """后台读取页数，列表项逐页出现，避免阻塞界面线程"""
+    page_found = pyqtSignal(object)  # PageRef
+    error_occurred = pyqtSignal(str, str)  # 文件路径, 错误信息
+
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = list(paths)
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def run(self):
+        # 通过 pdfinfo 列出所有页，不做光栅化
+        for path in self.paths:
+            if self._stopped:
+                return
+            try:
+                for ref in iter_page_refs(path):
+                    self.page_found.emit(ref)
+            except Exception as e:
+                self.error_occurred.emit(path, str(e))
+
+
+class ThumbnailService(QObject):
+    """缩略图服务：线程池中低分辨率渲染（带磁盘缓存），完成后通过信号回到界面线程
+
+    工作线程里只生成 QImage（可跨线程），QPixmap/QIcon 仍由界面线程在槽函数中创建。
+    """
+    thumbnail_ready = pyqtSignal(object, QImage)  # PageRef, 缩略图
+    error_occurred = pyqtSignal(str, str)  # 文件路径, 错误信息
+
+    def __init__(self, store=None, workers=DEFAULT_THUMB_WORKERS, parent=None):
+        super().__init__(parent)
+        self.store = store or ThumbnailStore()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers),
+                                            thread_name_prefix='thumbnail')
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._generation = 0
+
+    def request(self, ref):
+        """排队生成一页缩略图，同一页重复请求只处理一次"""
+        with self._lock:
+            if ref in self._pending:
+                return
+            self._pending.add(ref)
+            generation = self._generation
+        self._executor.submit(self._render, ref, generation)
+
+    def cancel(self):
+        """丢弃所有尚未完成的请求"""
+        with self._lock:
+            self._generation += 1
+            self._pending.clear()
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _render(self, ref, generation):
+        if generation != self._generation:
+            return
+        try:
+            thumb = self.store.get(ref)
+            qimg = QImage(thumb.tobytes(), thumb.width, thumb.height,
+                          thumb.width * 3, QImage.Format_RGB888).copy()
+        except Exception as e:
+            if generation == self._generation:
+                self.error_occurred.emit(ref.path, str(e))
+            return
+        finally:
+            with self._lock:
+                self._pending.discard(ref)
+        if generation == self._generation:
+            self.thumbnail_ready.emit(ref, qimg)
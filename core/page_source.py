@@ -0,0 +1,90 @@
+import os
+from collections import namedtuple
+
+from PIL import Image
+
+from core import metrics
+
+
+POPPLER_PATH = r"poppler/Library/bin"
+PDF_DPI = 300
+THUMB_DPI = 30  # 缩略图只需低分辨率渲染
+THUMB_SIZE = (100, 100)
+
+# 页面引用：只记录文件路径和页码（从1开始），图像按需解码
+PageRef = namedtuple('PageRef', ['path', 'page'])
+
+
+def is_pdf(path):
+    return path.lower().endswith('.pdf')
+
+
+def page_count(path):
+    """通过 pdfinfo 获取页数，不做任何光栅化"""
+    if is_pdf(path):
+        from pdf2image import pdfinfo_from_path
+        return int(pdfinfo_from_path(path, poppler_path=POPPLER_PATH)['Pages'])
+    return 1
+
+
+def iter_page_refs(path):
+    for page in range(1, page_count(path) + 1):
+        yield PageRef(path, page)
+
+
+def list_pages(file_paths):
+    """列出输入文件的所有页面引用及元数据（只读取页数，不解码图像）"""
+    pages = []
+    file_info = []
+    for path in file_paths:
+        pdf = is_pdf(path)
+        for ref in iter_page_refs(path):
+            pages.append(ref)
+            file_info.append({
+                'filename': os.path.basename(path),
+                'filepath': path,
+                'page': ref.page if pdf else None
+            })
+    return pages, file_info
+
+
+def render_page(ref, dpi=PDF_DPI):
+    """按需渲染单页（PDF 使用 first_page/last_page 只光栅化这一页）"""
+    if is_pdf(ref.path):
+        from pdf2image import convert_from_path
+        with metrics.timer('render.pdf'):
+            pages = convert_from_path(ref.path, dpi=dpi, first_page=ref.page, last_page=ref.page,
+                                      poppler_path=POPPLER_PATH)
+        if not pages:
+            raise ValueError(f"无法渲染 {os.path.basename(ref.path)} 第{ref.page}页")
+        return pages[0]
+    with metrics.timer('render.image'):
+        img = Image.open(ref.path)
+        img.load()
+    return img
+
+
+def render_page_rgb(ref, dpi=PDF_DPI, target_size=None):
+    """渲染为 RGB，可选统一缩放到 target_size（批量识别使用的固定尺寸）"""
+    img = render_page(ref, dpi=dpi)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if target_size:
+        img = img.resize(target_size, Image.Resampling.LANCZOS)
+    return img
+
+
+def render_thumbnail(ref, size=THUMB_SIZE):
+    """低分辨率渲染缩略图（RGB）"""
+    img = render_page(ref, dpi=THUMB_DPI)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img.thumbnail(size)
+    return img
+
+
+def display_name(ref):
+    """文件列表中显示的名称"""
+    if is_pdf(ref.path):
+        return f"{ref.path} (第{ref.page}页)"
+    return ref.path
@@ -0,0 +1,104 @@
+from core.preprocess import Preprocessor, preprocess_full
+from core.region_extract import PageRegions
+from core.templates import normalize_regions, scale_regions
+
+
+# 兼容旧接口：完整预处理（二值化 + 降噪）
+preprocess_image = preprocess_full
+
+
+def crop_regions(img_pil, regions, preprocess=preprocess_image):
+    """按区域裁剪页面（BGR），可选预处理；只分配区域大小的内存"""
+    page = PageRegions(img_pil)
+    crops = []
+    for region in regions:
+        roi = page.bgr(region)
+        crops.append(preprocess(roi) if preprocess else roi)
+    return crops
+
+
+def recognize_regions(recognizer, images, regions_per_image, preprocessor=None, cache=None):
+    """每张图片各自的一组区域：裁剪→预处理→批量识别，返回每张图片的文本行列表
+
+    preprocessor 为 Preprocessor 实例（默认自动判断电子版/扫描件），各阶段耗时记录在其 timings 中。
+    传入 cache 时以原始区域像素为键查询，命中的区域连预处理也一并跳过。
+    """
+    preprocessor = preprocessor or Preprocessor()
+    timings = preprocessor.timings
+    crops, profiles = [], []
+    for img_pil, regions in zip(images, regions_per_image):
+        if not regions:
+            continue
+        profile = preprocessor.select(img_pil)
+        with timings.measure('crop'):
+            crops.extend(crop_regions(img_pil, regions, None))
+        profiles.extend([profile] * len(regions))
+
+    def compute(indexes):
+        prepared = [preprocessor.apply(crops[i], profiles[i]) for i in indexes]
+        with timings.measure('recognize'):
+            return recognizer.recognize(prepared)
+
+    if cache is not None:
+        tag = recognizer.settings_tag()
+        lines = cache.recognize(crops, [f"pre={profile};{tag}" for profile in profiles], compute)
+    else:
+        lines = compute(range(len(crops)))
+
+    results, offset = [], 0
+    for regions in regions_per_image:
+        results.append(lines[offset:offset + len(regions)])
+        offset += len(regions)
+    return results
+
+
+def align_page_regions(aligner, img_pil, regions):
+    """按页面实际位置校正区域（regions 为该图像尺寸下的像素坐标）"""
+    return scale_regions(aligner.align_regions(img_pil, normalize_regions(regions, img_pil.size)), img_pil.size)
+
+
+def recognize_refs(recognizer, refs, regions, load_image, image_size, preprocessor=None,
+                   cache=None, text_layer=None, aligner=None):
+    """按页面引用识别：电子版 PDF 先读文字层，只有取不到文字的区域才渲染页面并 OCR
+
+    regions 为 image_size 尺寸下的像素坐标，load_image(ref) 返回该尺寸的页面图像。
+    传入 aligner（core.alignment.PageAligner）时，OCR 前先按页对齐区域；
+    文字层直接按模板坐标读取（电子版 PDF 不存在扫描偏移）。
+    """
+    preprocessor = preprocessor or Preprocessor()
+    timings = preprocessor.timings
+    rows = []
+    for ref in refs:
+        if text_layer is not None:
+            with timings.measure('text_layer'):
+                rows.append(text_layer.extract(ref, regions, image_size))
+        else:
+            rows.append([None] * len(regions))
+
+    # 只渲染仍有区域缺少文字的页面
+    pending = [i for i, row in enumerate(rows) if any(lines is None for lines in row)]
+    images, missing, loaded = [], [], []
+    for i in pending:
+        try:
+            with timings.measure('render'):
+                images.append(load_image(refs[i]))
+        except Exception as e:
+            rows[i] = [lines if lines is not None else [f"识别错误: {str(e)}"] for lines in rows[i]]
+            continue
+        page_regions = regions
+        if aligner is not None:
+            with timings.measure('align'):
+                page_regions = align_page_regions(aligner, images[-1], regions)
+        slots = [j for j, lines in enumerate(rows[i]) if lines is None]
+        missing.append([page_regions[j] for j in slots])
+        loaded.append((i, slots))
+
+    try:
+        ocr_lines = recognize_regions(recognizer, images, missing, preprocessor, cache)
+    except Exception as e:
+        ocr_lines = [[[f"识别错误: {str(e)}"]] * len(slots) for _, slots in loaded]
+    for (i, slots), page_lines in zip(loaded, ocr_lines):
+        for j, lines in zip(slots, page_lines):
+            rows[i][j] = lines
+
+    return [[' '.join(lines) for lines in row] for row in rows]
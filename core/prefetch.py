@@ -0,0 +1,88 @@
+import os
+import threading
+
+from core.page_cache import TIER_PREVIEW, TIER_FULL
+
+
+# 沿浏览方向预取的页数（反方向只预取一页）
+DEFAULT_RADIUS = int(os.environ.get("PREFETCH_PAGES", "2"))
+
+
+class PagePrefetcher:
+    """根据列表浏览方向在后台预取相邻页到 PageCache，翻页时直接命中缓存
+
+    只有一个后台线程；新的浏览位置会取代尚未完成的旧计划，不会堆积过期任务。
+    预取到 RGB 图像为止，显示用的 QPixmap / PhotoImage 只能在界面线程创建。
+    """
+
+    def __init__(self, page_cache, tiers=(TIER_PREVIEW,), radius=DEFAULT_RADIUS):
+        self.page_cache = page_cache
+        self.tiers = tuple(tiers)
+        self.radius = radius
+        self.prefetched = 0
+        self._cond = threading.Condition()
+        self._plan = None
+        self._generation = 0
+        self._last_index = None
+        self._direction = 1
+        self._stopped = False
+        self._thread = None
+
+    def plan(self, count, index):
+        """预取顺序：沿浏览方向的 radius 页优先，其次反方向一页"""
+        if self._last_index is not None and index != self._last_index:
+            self._direction = 1 if index > self._last_index else -1
+        self._last_index = index
+        ahead = [index + self._direction * step for step in range(1, self.radius + 1)]
+        behind = [index - self._direction]
+        return [i for i in ahead + behind if 0 <= i < count]
+
+    def navigate(self, refs, index):
+        """当前页切换为 refs[index] 时调用"""
+        if self.radius <= 0 or index == self._last_index:
+            return
+        targets = [refs[i] for i in self.plan(len(refs), index)]
+        with self._cond:
+            self._generation += 1
+            self._plan = targets
+            self._cond.notify()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='page-prefetch', daemon=True)
+            self._thread.start()
+
+    def cancel(self):
+        with self._cond:
+            self._generation += 1
+            self._plan = None
+            self._last_index = None
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._generation += 1
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._plan is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                targets, generation = self._plan, self._generation
+                self._plan = None
+
+            for ref in targets:
+                for tier in self.tiers:
+                    if generation != self._generation:
+                        break
+                    if self.page_cache.peek(ref, tier) is not None:
+                        continue
+                    try:
+                        if tier == TIER_FULL:
+                            self.page_cache.get_full(ref)
+                        else:
+                            self.page_cache.get_preview(ref)
+                        self.prefetched += 1
+                    except Exception:
+                        pass  # 预取失败不影响浏览，真正打开时会再报错
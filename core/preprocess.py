@@ -0,0 +1,128 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from core import metrics
+
+
+PROFILE_AUTO = 'auto'
+PROFILE_NONE = 'none'
+PROFILE_FAST = 'fast'
+PROFILE_FULL = 'full'
+
+# 界面显示名称
+PROFILE_LABELS = {
+    PROFILE_AUTO: "自动判断",
+    PROFILE_NONE: "不处理",
+    PROFILE_FAST: "快速二值化",
+    PROFILE_FULL: "完整降噪",
+}
+
+# 电子版（矢量 PDF 渲染）页面：大面积纯白背景、几乎没有浅灰噪点
+DIGITAL_MIN_WHITE_RATIO = 0.6
+DIGITAL_MAX_NOISE_RATIO = 0.15
+
+
+def preprocess_none(image):
+    return image
+
+
+def preprocess_fast(image):
+    """仅灰度 + 自适应二值化"""
+    import cv2  # 首次预处理时才加载，界面启动时只需要方案名称
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    thresh = cv2.adaptiveThreshold(gray, 255,
+                                   cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY, 11, 2)
+    return cv2.cvtColor(thresh, cv2.COLOR_GRAY2BGR)
+
+
+def preprocess_full(image):
+    """图像预处理增强识别效果"""
+    import cv2
+    # 转为灰度图
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    # 自适应二值化
+    thresh = cv2.adaptiveThreshold(gray, 255,
+                                   cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY, 11, 2)
+    # 降噪（最耗时的一步，只用于扫描件）
+    denoised = cv2.fastNlMeansDenoising(thresh, h=10)
+    # 转为三通道
+    return cv2.cvtColor(denoised, cv2.COLOR_GRAY2BGR)
+
+
+PROFILES = {
+    PROFILE_NONE: preprocess_none,
+    PROFILE_FAST: preprocess_fast,
+    PROFILE_FULL: preprocess_full,
+}
+
+
+def is_born_digital(img_pil):
+    """在缩小后的灰度图上统计直方图，判断页面是电子版渲染还是扫描件"""
+    small = img_pil.reduce(4) if min(img_pil.size) >= 64 else img_pil
+    hist = small.convert('L').histogram()
+    total = sum(hist) or 1
+    white_ratio = hist[255] / total
+    noise_ratio = sum(hist[200:255]) / total
+    return white_ratio >= DIGITAL_MIN_WHITE_RATIO and noise_ratio <= DIGITAL_MAX_NOISE_RATIO
+
+
+class StageTimings:
+    """按阶段累计耗时（秒）与次数，线程安全；同时计入 core.metrics（名称为 stage.<阶段>）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage, seconds, count=1):
+        with self._lock:
+            total, n = self._stages.get(stage, (0.0, 0))
+            self._stages[stage] = (total + seconds, n + count)
+        metrics.record_time(f'stage.{stage}', seconds, count)
+
+    def merge(self, snapshot):
+        for stage, (seconds, count) in snapshot.items():
+            self.add(stage, seconds, count)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._stages)
+
+    def summary(self):
+        return ', '.join(f"{stage} {seconds:.2f}s/{count}次"
+                         for stage, (seconds, count) in self.snapshot().items())
+
+
+class Preprocessor:
+    """可选的预处理流程：none / fast / full，auto 时按页面自动选择"""
+
+    def __init__(self, profile=PROFILE_AUTO, timings=None, scanned_profile=PROFILE_FULL,
+                 digital_profile=PROFILE_NONE):
+        if profile != PROFILE_AUTO and profile not in PROFILES:
+            raise ValueError(f"未知的预处理方案: {profile}")
+        self.profile = profile
+        self.scanned_profile = scanned_profile
+        self.digital_profile = digital_profile
+        self.timings = timings if timings is not None else StageTimings()
+
+    def select(self, img_pil):
+        """为整页选择预处理方案"""
+        if self.profile != PROFILE_AUTO:
+            return self.profile
+        with self.timings.measure('detect'):
+            digital = is_born_digital(img_pil)
+        return self.digital_profile if digital else self.scanned_profile
+
+    def apply(self, roi, profile):
+        with self.timings.measure(f'preprocess:{profile}'):
+            return PROFILES[profile](roi)
@@ -0,0 +1,34 @@
+import numpy as np
+
+
+class PageRegions:
+    """按区域裁剪页面：先在 PIL 上裁剪再转为 numpy 数组，内存分配只与区域大小有关
+
+    （np.asarray 整页时 Pillow 会先 tobytes() 复制整页，所以不对整页建数组）
+    """
+
+    def __init__(self, img_pil):
+        self.image = img_pil
+        self.width, self.height = img_pil.size
+
+    def clamp(self, region):
+        """把区域坐标限制在页面范围内，返回整数坐标"""
+        x1, y1, x2, y2 = map(int, region)
+        x1 = max(0, min(x1, self.width - 1))
+        y1 = max(0, min(y1, self.height - 1))
+        x2 = max(x1 + 1, min(x2, self.width))
+        y2 = max(y1 + 1, min(y2, self.height))
+        return x1, y1, x2, y2
+
+    def crop(self, region):
+        """区域图像（RGB），颜色转换只作用在区域像素上"""
+        crop = self.image.crop(self.clamp(region))
+        return crop if crop.mode == 'RGB' else crop.convert('RGB')
+
+    def rgb(self, region):
+        """区域像素（RGB，连续内存，可写）"""
+        return np.array(self.crop(region))
+
+    def bgr(self, region):
+        """区域像素（BGR），通道翻转只在区域上进行"""
+        return np.ascontiguousarray(self.rgb(region)[:, :, ::-1])
@@ -0,0 +1,124 @@
+import numpy as np
+
+from core import metrics
+from core.engine_pool import get_engine_pool
+
+
+DEFAULT_BATCH_SIZE = 16
+# 自动判定单行字段：高度不超过该值且足够“扁”的区域直接跳过检测
+SINGLE_LINE_MAX_HEIGHT = 120
+SINGLE_LINE_MIN_ASPECT = 3.0
+# 跳过检测后识别置信度低于该值时，回退到完整的检测+识别
+FALLBACK_MIN_SCORE = 0.5
+
+
+class RecognitionCancelled(Exception):
+    """识别过程中被调用方取消"""
+
+
+def is_single_line(crop):
+    """根据区域尺寸粗略判断是否为单行文本"""
+    h, w = crop.shape[:2]
+    return 0 < h <= SINGLE_LINE_MAX_HEIGHT and w >= h * SINGLE_LINE_MIN_ASPECT
+
+
+def _as_bgr(crop):
+    # 批量识别时 PaddleOCR 不会再做通道转换，灰度图需手动扩展为三通道
+    if crop.ndim == 2:
+        return np.repeat(crop[:, :, None], 3, axis=2)
+    return crop
+
+
+class RegionRecognizer:
+    """批量区域识别：单行字段打包成一次识别批处理，多行字段才走检测+识别"""
+
+    def __init__(self, pool=None, batch_size=DEFAULT_BATCH_SIZE, use_cls=False,
+                 min_score=FALLBACK_MIN_SCORE):
+        self.pool = pool or get_engine_pool()
+        self.batch_size = max(1, int(batch_size))
+        self.use_cls = use_cls
+        self.min_score = min_score
+
+    def settings_tag(self, single_line=None):
+        """影响识别结果的参数描述，用于结果缓存的键"""
+        return f"cls={int(self.use_cls)};single={single_line};min={self.min_score}"
+
+    def _resolve_modes(self, crops, single_line):
+        """返回每个区域的模式：True 仅识别，False 检测+识别，None 自动（可回退）"""
+        if single_line is None or isinstance(single_line, bool):
+            single_line = [single_line] * len(crops)
+        modes = []
+        for crop, flag in zip(crops, single_line):
+            if flag is None:
+                modes.append(None if is_single_line(crop) else False)
+            else:
+                modes.append(bool(flag))
+        return modes
+
+    def recognize(self, crops, single_line=None, on_region=None, cancelled=None):
+        """识别一组区域图像（numpy数组），返回每个区域的文本行列表
+
+        single_line 可为 None（按尺寸自动判断）、布尔值或与 crops 等长的列表。
+        on_region(序号, 文本行) 在每个区域结果确定时调用；cancelled() 返回 True 时
+        在下一批/下一个区域之前抛出 RecognitionCancelled。
+        """
+        results = [None] * len(crops)
+        if not crops:
+            return results
+        modes = self._resolve_modes(crops, single_line)
+
+        def check():
+            if cancelled is not None and cancelled():
+                raise RecognitionCancelled()
+
+        def done(i, lines):
+            results[i] = lines
+            if on_region is not None:
+                on_region(i, lines)
+
+        with self.pool.acquire() as ocr:
+            rec_only = [i for i, mode in enumerate(modes) if mode is not False]
+            for start in range(0, len(rec_only), self.batch_size):
+                check()
+                chunk = rec_only[start:start + self.batch_size]
+                try:
+                    outputs = self._rec_batch(ocr, [crops[i] for i in chunk])
+                except Exception as e:
+                    # 整批失败时交给下方逐个区域的检测+识别
+                    metrics.incr('ocr.rec_batch_errors')
+                    print(f"批量识别失败，改为逐个区域识别：{str(e)}")
+                    continue
+                for i, (text, score) in zip(chunk, outputs):
+                    if modes[i] is None and (not text or score < self.min_score):
+                        continue
+                    done(i, [text] if text else [])
+
+            for i, lines in enumerate(results):
+                if lines is None:
+                    check()
+                    done(i, self._det_rec(ocr, crops[i]))
+        return results
+
+    def _rec_batch(self, ocr, crops):
+        metrics.observe('ocr.rec_batch_size', len(crops))
+        with metrics.timer('ocr.rec_batch'):
+            return self._run_rec_batch(ocr, crops)
+
+    def _run_rec_batch(self, ocr, crops):
+        recognizer = getattr(ocr, 'text_recognizer', None)
+        if recognizer is not None and hasattr(recognizer, 'rec_batch_num'):
+            recognizer.rec_batch_num = max(recognizer.rec_batch_num, len(crops))
+        # 外层列表的每一项会被当作一页处理，所有区域需放在同一个内层列表里才会合并为一批
+        result = ocr.ocr([[_as_bgr(crop) for crop in crops]], det=False, cls=self.use_cls)
+        outputs = result[0] if result else []
+        if len(outputs) != len(crops):
+            raise ValueError("批量识别结果数量不匹配")
+        return [(text, score) for text, score in outputs]
+
+    def _det_rec(self, ocr, crop):
+        try:
+            with metrics.timer('ocr.det_rec'):
+                result = ocr.ocr(crop, cls=self.use_cls)
+            return [line[1][0] for line in result[0]] if result and result[0] else []
+        except Exception as e:
+            return [f"识别错误: {str(e)}"]
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from core import metrics
+
+from core.engine_pool import MODEL_DIR, default_engine_kwargs
+
+
+DEFAULT_CACHE_PATH = os.environ.get("OCR_CACHE_PATH", "ocr_cache.sqlite3")
+# 超出上限时按最近使用时间清理
+MAX_ENTRIES = int(os.environ.get("OCR_CACHE_MAX_ENTRIES", "200000"))
+ERROR_PREFIX = "识别错误"
+
+
+def model_fingerprint(model_dir=MODEL_DIR):
+    """模型文件（大小、修改时间）与引擎参数的指纹，模型更新后旧缓存自动失效"""
+    h = hashlib.sha1()
+    for root, _, files in sorted(os.walk(model_dir)):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            h.update(f"{os.path.relpath(path, model_dir)}:{stat.st_size}:{int(stat.st_mtime)};".encode())
+    h.update(repr(sorted(default_engine_kwargs().items())).encode())
+    return h.hexdigest()[:16]
+
+
+class OCRResultCache:
+    """磁盘上的区域识别结果缓存（SQLite），键为区域像素哈希 + 模型指纹 + 处理参数"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, model_tag=None, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.model_tag = model_tag if model_tag is not None else model_fingerprint()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                "key TEXT PRIMARY KEY, lines TEXT NOT NULL, used_at REAL NOT NULL)")
+        self._prune()
+
+    def key(self, crop, settings=''):
+        crop = np.ascontiguousarray(crop)
+        h = hashlib.blake2b(digest_size=20)
+        h.update(self.model_tag.encode())
+        h.update(settings.encode())
+        h.update(f"{crop.shape}{crop.dtype}".encode())
+        h.update(crop.data)
+        return h.hexdigest()
+
+    def get_many(self, keys):
+        found = {}
+        if not keys:
+            return found
+        unique = list(set(keys))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, lines FROM ocr_results WHERE key IN ({placeholders})", chunk)
+                for key, lines in rows:
+                    found[key] = json.loads(lines)
+            if found:
+                with self._conn:
+                    self._conn.executemany("UPDATE ocr_results SET used_at=? WHERE key=?",
+                                           [(time.time(), key) for key in found])
+        return found
+
+    def put_many(self, items):
+        """写入 {key: lines}，识别出错的结果不缓存"""
+        rows = [(key, json.dumps(lines, ensure_ascii=False), time.time())
+                for key, lines in items.items()
+                if not any(line.startswith(ERROR_PREFIX) for line in lines)]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ocr_results (key, lines, used_at) VALUES (?, ?, ?)", rows)
+
+    def recognize(self, crops, settings, compute, on_cached=None):
+        """先查缓存，未命中的区域交给 compute(缺失序号列表) 批量识别后回写
+
+        settings 为与 crops 等长的参数描述列表；返回每个区域的文本行列表。
+        on_cached(序号, 文本行) 在识别之前为每个命中缓存的区域调用一次。
+        """
+        keys = [self.key(crop, setting) for crop, setting in zip(crops, settings)]
+        found = self.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        metrics.incr('result_cache.hit', len(keys) - len(missing))
+        metrics.incr('result_cache.miss', len(missing))
+
+        results = [found.get(key) for key in keys]
+        if on_cached is not None:
+            for i, lines in enumerate(results):
+                if lines is not None:
+                    on_cached(i, lines)
+        if missing:
+            computed = compute(missing)
+            for i, lines in zip(missing, computed):
+                results[i] = lines
+            self.put_many({keys[i]: lines for i, lines in zip(missing, computed)})
+        return results
+
+    def _prune(self):
+        with self._lock, self._conn:
+            count = self._conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM ocr_results WHERE key IN ("
+                    "SELECT key FROM ocr_results ORDER BY used_at LIMIT ?)",
+                    (count - self.max_entries,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM ocr_results")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """进程级共享的结果缓存；设置环境变量 OCR_CACHE=0 可关闭（返回 None）"""
+    global _cache
+    if os.environ.get("OCR_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = OCRResultCache()
+            except (sqlite3.Error, OSError) as e:
+                print(f"OCR结果缓存不可用：{str(e)}")
+                return None
+        return _cache
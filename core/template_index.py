@@ -0,0 +1,127 @@
+"""模板自动识别：用低分辨率页面的感知哈希（dHash）找出最接近的已保存模板
+
+指纹只取 17x16 的灰度缩略图相邻像素的明暗关系，表格线、标题栏等版面结构决定了指纹，
+每张发票各不相同的具体文字影响很小。页面指纹取自缩略图缓存（30dpi 渲染），
+与模板参考图的指纹比较汉明距离，超过阈值视为未匹配。
+"""
+import os
+import threading
+from collections import namedtuple
+
+from PIL import Image
+
+from core import metrics
+from core.templates import TEMPLATE_DIR, list_templates, load_template
+from core.thumbnails import ThumbnailStore
+
+
+HASH_SIZE = 16
+# 归一化汉明距离阈值（两张无关图片约为 0.5）
+MAX_DISTANCE = float(os.environ.get("TEMPLATE_MATCH_DISTANCE", "0.3"))
+
+TemplateMatch = namedtuple('TemplateMatch', ['template', 'distance'])
+
+
+def page_fingerprint(img):
+    """dHash：缩小为 (HASH_SIZE+1) x HASH_SIZE 灰度图，逐行比较相邻像素，得到 HASH_SIZE² 位整数"""
+    gray = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX)
+    pixels = gray.tobytes()
+    bits = 0
+    for y in range(HASH_SIZE):
+        row = pixels[y * (HASH_SIZE + 1):(y + 1) * (HASH_SIZE + 1)]
+        for x in range(HASH_SIZE):
+            bits = (bits << 1) | (row[x] > row[x + 1])
+    return bits
+
+
+def hash_distance(a, b):
+    return bin(a ^ b).count('1') / (HASH_SIZE * HASH_SIZE)
+
+
+class TemplateIndex:
+    """模板指纹索引，同一模板可加入多张样本页"""
+
+    def __init__(self, templates=()):
+        self._entries = []  # (指纹, 模板)
+        for template in templates:
+            self.add(template)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, template, img=None):
+        """img 为该版面的样本页，默认使用模板参考图；没有参考图的旧模板不能参与自动识别"""
+        if img is None:
+            if not template.get('reference'):
+                return False
+            with Image.open(template['reference']) as reference:
+                fingerprint = page_fingerprint(reference)
+        else:
+            fingerprint = page_fingerprint(img)
+        self._entries.append((fingerprint, template))
+        return True
+
+    def templates(self):
+        """索引中的模板（按名称去重，保持加入顺序）"""
+        seen = {}
+        for _, template in self._entries:
+            seen.setdefault(template['name'], template)
+        return list(seen.values())
+
+    def max_region_count(self):
+        return max((len(t['regions_norm']) for t in self.templates()), default=0)
+
+    def match(self, img):
+        """距离最近的模板，索引为空时返回 None"""
+        fingerprint = page_fingerprint(img)
+        best = None
+        for entry, template in self._entries:
+            distance = hash_distance(fingerprint, entry)
+            if best is None or distance < best.distance:
+                best = TemplateMatch(template, distance)
+        return best
+
+    def classify(self, img, max_distance=MAX_DISTANCE):
+        """返回匹配的模板，没有足够接近的模板时返回 None"""
+        with metrics.timer('classify.page'):
+            best = self.match(img)
+        if best is None or best.distance > max_distance:
+            metrics.incr('classify.unmatched')
+            return None
+        metrics.incr('classify.matched')
+        return best.template
+
+    @classmethod
+    def from_directory(cls, directory=TEMPLATE_DIR):
+        """读取模板目录中所有带参考图的模板"""
+        index = cls()
+        for name, path in list_templates(directory):
+            try:
+                index.add(load_template(path))
+            except (OSError, ValueError) as e:
+                print(f"模板读取失败：{name} {e}")
+        return index
+
+
+class PageClassifier:
+    """按页面引用分类：指纹取自缩略图磁盘缓存，同一文件重复处理时无需再次渲染"""
+
+    def __init__(self, index, thumbnails=None):
+        self.index = index
+        self.thumbnails = thumbnails or ThumbnailStore()
+
+    def classify(self, ref):
+        return self.index.classify(self.thumbnails.get(ref))
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_template_index(directory=TEMPLATE_DIR):
+    """按目录复用模板索引（批量识别子进程内只读取一次模板）"""
+    with _indexes_lock:
+        index = _indexes.get(directory)
+        if index is None:
+            index = _indexes[directory] = TemplateIndex.from_directory(directory)
+        return index
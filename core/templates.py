@@ -0,0 +1,85 @@
+import json
+import os
+
+
+TEMPLATE_DIR = "templates"
+REFERENCE_SUFFIX = ".ref.png"
+
+
+def normalize_regions(regions, image_size):
+    """像素坐标 → 相对页面宽高的比例坐标（0~1）"""
+    width, height = image_size
+    return [(x0 / width, y0 / height, x1 / width, y1 / height) for x0, y0, x1, y1 in regions]
+
+
+def scale_regions(regions_norm, image_size):
+    """比例坐标 → image_size 下的像素坐标"""
+    width, height = image_size
+    return [(int(round(x0 * width)), int(round(y0 * height)), int(round(x1 * width)), int(round(y1 * height)))
+            for x0, y0, x1, y1 in regions_norm]
+
+
+def template_path(name, directory=TEMPLATE_DIR):
+    return os.path.join(directory, f"{name}.json")
+
+
+def list_templates(directory=TEMPLATE_DIR):
+    """模板目录中的所有模板，返回 [(名称, 路径)]，按名称排序"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(os.path.splitext(f)[0] for f in os.listdir(directory) if f.lower().endswith('.json'))
+    return [(name, template_path(name, directory)) for name in names]
+
+
+def save_template(path, regions, image_size, name=None, field_names=None, reference=None):
+    """保存区域模板（regions 为 image_size 下的像素坐标，同时保存比例坐标）
+
+    reference 为画框时的页面图像，缩小后保存在模板旁，用于识别时逐页对齐。
+    """
+    data = {
+        'name': name or os.path.splitext(os.path.basename(path))[0],
+        'image_size': list(image_size),
+        'regions': [list(map(int, region)) for region in regions],
+        'regions_norm': [[round(v, 6) for v in region] for region in normalize_regions(regions, image_size)],
+        'field_names': list(field_names or []),
+    }
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    if reference is not None:
+        from core.alignment import reference_image
+        ref_path = os.path.splitext(path)[0] + REFERENCE_SUFFIX
+        reference_image(reference).save(ref_path)
+        data['reference'] = os.path.basename(ref_path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return data
+
+
+def load_template(path):
+    """读取区域模板，返回包含 name/image_size/regions/regions_norm/field_names/reference 的字典
+
+    reference 为参考图的完整路径（没有参考图的旧模板为 None，识别时不做对齐）。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not data.get('regions'):
+        raise ValueError(f"模板中没有区域: {path}")
+    data['image_size'] = tuple(data['image_size'])
+    data['regions'] = [tuple(int(v) for v in region) for region in data['regions']]
+    if data.get('regions_norm'):
+        data['regions_norm'] = [tuple(float(v) for v in region) for region in data['regions_norm']]
+    else:
+        data['regions_norm'] = normalize_regions(data['regions'], data['image_size'])
+    data.setdefault('field_names', [])
+    data.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    reference = data.get('reference')
+    if reference:
+        reference = os.path.join(os.path.dirname(os.path.abspath(path)), reference)
+    data['reference'] = reference if reference and os.path.exists(reference) else None
+    return data
+
+
+def template_regions(template, image_size):
+    """模板区域换算到 image_size 下的像素坐标"""
+    return scale_regions(template['regions_norm'], image_size)
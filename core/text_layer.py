@@ -0,0 +1,145 @@
+import html
+import os
+import re
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict, namedtuple
+
+from core import metrics
+from core.page_source import POPPLER_PATH, is_pdf
+
+
+MAX_CACHED_PAGES = 256
+
+Word = namedtuple('Word', ['x0', 'y0', 'x1', 'y1', 'text'])
+PageText = namedtuple('PageText', ['width', 'height', 'words'])  # 单位：PDF 点（1/72 英寸）
+
+_PAGE_RE = re.compile(r'<page width="([\d.]+)" height="([\d.]+)">')
+_WORD_RE = re.compile(
+    r'<word xMin="([\d.]+)" yMin="([\d.]+)" xMax="([\d.]+)" yMax="([\d.]+)">(.*?)</word>', re.S)
+
+
+def find_pdftotext():
+    """优先使用随程序附带的 poppler，其次系统 PATH"""
+    name = 'pdftotext.exe' if os.name == 'nt' else 'pdftotext'
+    bundled = os.path.join(POPPLER_PATH, name)
+    if os.path.isfile(bundled):
+        return bundled
+    return shutil.which('pdftotext')
+
+
+def parse_bbox_html(content):
+    """解析 pdftotext -bbox 输出的第一页"""
+    page = _PAGE_RE.search(content)
+    if not page:
+        return None
+    words = [Word(float(x0), float(y0), float(x1), float(y1), html.unescape(text))
+             for x0, y0, x1, y1, text in _WORD_RE.findall(content[page.end():])]
+    return PageText(float(page.group(1)), float(page.group(2)), words)
+
+
+def _join_words(words):
+    """同一行内的词：中文直接相连，西文之间保留空格"""
+    text = ''
+    for word in words:
+        if text and text[-1].isascii() and text[-1].isalnum() \
+                and word.text[:1].isascii() and word.text[:1].isalnum():
+            text += ' '
+        text += word.text
+    return text
+
+
+def group_lines(words):
+    """按纵向位置把词归为文本行，返回行文本列表"""
+    lines = []
+    for word in sorted(words, key=lambda w: (w.y0, w.x0)):
+        center = (word.y0 + word.y1) / 2
+        if lines and lines[-1][0] <= center <= lines[-1][1]:
+            lines[-1][2].append(word)
+        else:
+            lines.append([word.y0, word.y1, [word]])
+    return [_join_words(sorted(line_words, key=lambda w: w.x0)) for _, _, line_words in lines]
+
+
+class TextLayer:
+    """电子版 PDF 的文字层提取：把界面上的区域换算为 PDF 坐标后直接取文字，无需 OCR"""
+
+    def __init__(self, pdftotext=None, max_pages=MAX_CACHED_PAGES):
+        self.pdftotext = pdftotext or find_pdftotext()
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return bool(self.pdftotext)
+
+    def page_text(self, ref):
+        """读取（并缓存）一页的所有文字框，非 PDF 或无法读取时返回 None"""
+        if not self.available or not is_pdf(ref.path):
+            return None
+        key = (ref.path, ref.page)
+        with self._lock:
+            if key in self._pages:
+                self._pages.move_to_end(key)
+                return self._pages[key]
+
+        try:
+            with metrics.timer('text_layer.pdftotext'):
+                completed = subprocess.run(
+                    [self.pdftotext, '-bbox', '-f', str(ref.page), '-l', str(ref.page), ref.path, '-'],
+                    capture_output=True, timeout=30,
+                    creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            page = parse_bbox_html(completed.stdout.decode('utf-8', errors='replace')) \
+                if completed.returncode == 0 else None
+        except (OSError, subprocess.SubprocessError):
+            page = None
+
+        with self._lock:
+            self._pages[key] = page
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return page
+
+    def page_size(self, ref):
+        """页面尺寸（点），无法获取时返回 None"""
+        page = self.page_text(ref)
+        return (page.width, page.height) if page else None
+
+    def extract(self, ref, regions, image_size):
+        """按区域提取文字
+
+        regions 为 image_size 尺寸图像上的像素坐标；返回与 regions 等长的列表，
+        每项为文本行列表，区域内没有文字（或页面没有文字层）时为 None。
+        """
+        page = self.page_text(ref)
+        if not page or not page.words:
+            return [None] * len(regions)
+
+        scale_x = page.width / image_size[0]
+        scale_y = page.height / image_size[1]
+        results = []
+        for x0, y0, x1, y1 in regions:
+            left, top, right, bottom = x0 * scale_x, y0 * scale_y, x1 * scale_x, y1 * scale_y
+            inside = [word for word in page.words
+                      if left <= (word.x0 + word.x1) / 2 <= right
+                      and top <= (word.y0 + word.y1) / 2 <= bottom]
+            lines = [line for line in group_lines(inside) if line.strip()]
+            results.append(lines or None)
+        return results
+
+
+_text_layer = None
+_text_layer_lock = threading.Lock()
+
+
+def get_text_layer():
+    """进程级共享的文字层提取器；环境变量 TEXT_LAYER=0 时关闭（返回 None）"""
+    global _text_layer
+    if os.environ.get("TEXT_LAYER", "1") == "0":
+        return None
+    with _text_layer_lock:
+        if _text_layer is None:
+            _text_layer = TextLayer()
+        return _text_layer if _text_layer.available else None
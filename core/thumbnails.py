@@ -0,0 +1,54 @@
+import hashlib
+import os
+
+from PIL import Image
+
+from core.page_source import THUMB_SIZE, render_thumbnail
+
+
+DEFAULT_THUMB_DIR = os.environ.get("THUMB_CACHE_DIR", "thumb_cache")
+
+
+class ThumbnailStore:
+    """缩略图磁盘缓存：键为文件绝对路径 + 修改时间 + 大小 + 页码，文件变化后自动失效"""
+
+    def __init__(self, directory=DEFAULT_THUMB_DIR, size=THUMB_SIZE):
+        self.directory = directory
+        self.size = tuple(size)
+        os.makedirs(directory, exist_ok=True)
+
+    def cache_path(self, ref):
+        stat = os.stat(ref.path)
+        key = f"{os.path.abspath(ref.path)}|{stat.st_mtime_ns}|{stat.st_size}|{ref.page}|{self.size}"
+        name = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name + '.png')
+
+    def load(self, ref):
+        """读取已缓存的缩略图，没有（或文件损坏）时返回 None"""
+        path = self.cache_path(ref)
+        if not os.path.exists(path):
+            return None
+        try:
+            img = Image.open(path)
+            img.load()
+            return img.convert('RGB') if img.mode != 'RGB' else img
+        except OSError:
+            return None
+
+    def save(self, ref, img):
+        path = self.cache_path(ref)
+        # 先写临时文件再替换，多个线程同时写同一页也不会读到半个文件
+        tmp_path = f"{path}.{os.getpid()}.{id(img)}.tmp"
+        img.save(tmp_path, format='PNG')
+        os.replace(tmp_path, path)
+
+    def get(self, ref):
+        """优先读磁盘缓存，否则低分辨率渲染并写入缓存"""
+        img = self.load(ref)
+        if img is None:
+            img = render_thumbnail(ref, self.size)
+            try:
+                self.save(ref, img)
+            except OSError:
+                pass  # 缓存写失败不影响显示
+        return img
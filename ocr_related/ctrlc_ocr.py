@@ -1,11 +1,18 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
-from pdf2image import convert_from_path
-import paddleocr
-import os
+from PIL import ImageTk
+from core.engine_pool import get_engine_pool, WARM_UP_DELAY_MS
+from core.page_source import iter_page_refs
+from core.page_cache import PageCache, TIER_PREVIEW, TIER_FULL
+from core.prefetch import PagePrefetcher
+from core.display_scale import ScaledImageCache, Debouncer
+from core.ocr_worker import LatestRequestWorker
+from core import metrics
+from ocr_related.stats_window import StatsWindow
 import threading
-import numpy as np
 
 
 class OCRApp:
@@ -14,10 +21,21 @@ class OCRApp:
         self.master.title("小苏专用发票识别系统❤_V2")
         self.master.geometry("1200x800")
 
-        # 初始化PaddleOCR
-        self.ocr = paddleocr.PaddleOCR(use_gpu=False, cls_model_dir=".\ocrModel\cls\ch",
-                                       det_model_dir=".\ocrModel\det\ch", rec_model_dir=".\ocrModel\\rec\ch",
-                                       use_angle_cls=True, lang='ch')
+        # 初始化PaddleOCR（共享引擎池，窗口显示后再后台预热）
+        self.ocr_pool = get_engine_pool()
+        self.master.after(WARM_UP_DELAY_MS, self.ocr_pool.warm_up_async, 1, ('numpy',))
+        # 预览/原图两级页面缓存（与原先 convert_from_path 默认一致使用 200dpi）
+        self.page_cache = PageCache(dpi=200)
+        # 框选后要立即截取原图，相邻页的预览和原图都提前准备
+        self.prefetcher = PagePrefetcher(self.page_cache, tiers=(TIER_PREVIEW, TIER_FULL))
+        # 画布显示图按目标尺寸缓存；拖动窗口时快速缩放，停止后再高质量重绘
+        self.scaled_cache = ScaledImageCache()
+        self.resize_debouncer = Debouncer(self.master, self.on_resize_settled)
+        # 单个识别线程，连续框选时只识别最新的选区
+        self.ocr_worker = LatestRequestWorker(
+            self.recognize_selection,
+            lambda request_id, text, latency: self.master.after(0, self.update_ocr_result, text, latency),
+            lambda request_id, e: self.master.after(0, self.update_status, f"OCR错误：{str(e)}"))
 
         # 创建界面组件
         self.create_widgets()
@@ -43,6 +61,9 @@ class OCRApp:
         file_menu.add_separator()
         file_menu.add_command(label="退出", command=self.master.quit)
         menubar.add_cascade(label="文件", menu=file_menu)
+        tool_menu = tk.Menu(menubar, tearoff=0)
+        tool_menu.add_command(label="性能统计", command=lambda: StatsWindow(self.master))
+        menubar.add_cascade(label="工具", menu=tool_menu)
         self.master.config(menu=menubar)
 
         # 创建主界面布局
@@ -98,21 +119,17 @@ class OCRApp:
     def process_files(self, paths):
         for path in paths:
             try:
-                if path.lower().endswith('.pdf'):
-                    images = convert_from_path(path, poppler_path=r"poppler/Library/bin")
-                    for i, img in enumerate(images):
-                        self.add_image(img, path, i + 1)
-                else:
-                    img = Image.open(path)
-                    self.add_image(img, path)
+                # 只读取页数，页面在显示/识别时才渲染
+                for ref in iter_page_refs(path):
+                    self.add_image(ref)
             except Exception as e:
                 self.update_status(f"错误：无法打开文件 {os.path.basename(path)} - {str(e)}")
 
-    def add_image(self, img, path, page=1):
+    def add_image(self, ref):
         self.images.append({
-            'orig': img.copy(),
-            'path': path,
-            'page': page,
+            'ref': ref,
+            'path': ref.path,
+            'page': ref.page,
             'display': None,
             'scale': 1.0
         })
@@ -126,11 +143,14 @@ class OCRApp:
                 name += f" (Page {img_info['page']})"
             self.listbox.insert(tk.END, name)
 
+        # 列表已重建，旧的预取计划作废
+        self.prefetcher.cancel()
         # 自动选择第一个项目（如果有）
         if self.images:
             self.listbox.selection_set(0)
             self.current_image_index = 0
             self.show_image(self.images[0])
+            self.prefetch_neighbours()
         else:
             self.current_image = None
 
@@ -139,10 +159,14 @@ class OCRApp:
         if selection:
             self.current_image_index = selection[0]
             self.show_image(self.images[self.current_image_index])
+            self.prefetch_neighbours()
 
-    def show_image(self, img_info):
+    def prefetch_neighbours(self):
+        self.prefetcher.navigate([info['ref'] for info in self.images], self.current_image_index)
+
+    def show_image(self, img_info, fast=False):
         self.current_image = img_info
-        orig_img = img_info['orig']
+        orig_img = self.page_cache.get_preview(img_info['ref'])
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
 
@@ -152,9 +176,13 @@ class OCRApp:
         scale = min(width_ratio, height_ratio, 1.0)
         self.scale_factor = scale
 
-        new_size = (int(orig_img.width * scale), int(orig_img.height * scale))
-        display_img = orig_img.resize(new_size, Image.Resampling.LANCZOS)
-        img_info['display'] = ImageTk.PhotoImage(display_img)
+        new_size = (max(1, int(orig_img.width * scale)), max(1, int(orig_img.height * scale)))
+        # 尺寸和质量都没变时复用已有的 PhotoImage
+        display_key = (new_size, fast)
+        if img_info['display'] is None or img_info.get('display_key') != display_key:
+            display_img = self.scaled_cache.get(img_info['ref'], orig_img, new_size, fast=fast)
+            img_info['display'] = ImageTk.PhotoImage(display_img)
+            img_info['display_key'] = display_key
         img_info['scale'] = scale
 
         self.canvas.delete("all")
@@ -202,37 +230,46 @@ class OCRApp:
         end_x = self.canvas.canvasx(event.x)
         end_y = self.canvas.canvasy(event.y)
 
-        # 转换为原始图像坐标
-        x0 = int(min(self.start_x, end_x) / self.scale_factor)
-        y0 = int(min(self.start_y, end_y) / self.scale_factor)
-        x1 = int(max(self.start_x, end_x) / self.scale_factor)
-        y1 = int(max(self.start_y, end_y) / self.scale_factor)
-
-        # 截取区域图像
-        orig_img = self.current_image['orig']
-        if x0 < x1 and y0 < y1:
-            try:
-                region = orig_img.crop((x0, y0, x1, y1))
-                threading.Thread(target=self.async_ocr, args=(region,)).start()
-            except Exception as e:
-                self.update_status(f"错误：{str(e)}")
-
-    def async_ocr(self, region):
-        try:
-            result = self.ocr.ocr(np.array(region), cls=True)
-            texts = []
-            for line in result:
-                if line:
-                    for word in line:
-                        if word and len(word) >= 2:
-                            texts.append(word[1][0])
-            self.master.after(0, self.update_ocr_result, '\n'.join(texts))
-        except Exception as e:
-            self.master.after(0, self.update_status, f"OCR错误：{str(e)}")
-
-    def update_ocr_result(self, text):
+        # 转换为预览图坐标，原图的加载与截取在识别线程中完成
+        box = (min(self.start_x, end_x) / self.scale_factor,
+               min(self.start_y, end_y) / self.scale_factor,
+               max(self.start_x, end_x) / self.scale_factor,
+               max(self.start_y, end_y) / self.scale_factor)
+        if box[0] < box[2] and box[1] < box[3]:
+            self.ocr_worker.submit((self.current_image['ref'], box))
+            self.update_status(f"识别中…（队列 {self.ocr_worker.depth()}）")
+
+    def recognize_selection(self, request):
+        """识别线程：截取原图区域并识别，返回文字"""
+        ref, (px0, py0, px1, py1) = request
+        # 画布坐标按预览图缩放，截取时换算到原始分辨率
+        preview = self.page_cache.get_preview(ref)
+        orig_img = self.page_cache.get_full(ref)
+        ratio_x = orig_img.width / preview.width
+        ratio_y = orig_img.height / preview.height
+        region = orig_img.crop((int(px0 * ratio_x), int(py0 * ratio_y),
+                                int(px1 * ratio_x), int(py1 * ratio_y)))
+
+        import numpy as np  # 已由后台预热导入
+        with self.ocr_pool.acquire() as ocr:
+            result = ocr.ocr(np.array(region), cls=True)
+        texts = []
+        for line in result:
+            if line:
+                for word in line:
+                    if word and len(word) >= 2:
+                        texts.append(word[1][0])
+        return '\n'.join(texts)
+
+    def update_ocr_result(self, text, latency=None):
         self.last_ocr_text = text
-        self.update_status("识别完成，按Ctrl+C复制文字")
+        message = "识别完成，按Ctrl+C复制文字"
+        if latency is not None:
+            metrics.record_time('ui.selection_ocr', latency)
+            message += f"（耗时 {latency:.2f}s"
+            pending = self.ocr_worker.depth()
+            message += f"，队列 {pending}）" if pending else "）"
+        self.update_status(message)
 
     def copy_text(self, event=None):
         if self.last_ocr_text:
@@ -241,6 +278,11 @@ class OCRApp:
             self.update_status("文字已复制到剪贴板")
 
     def on_canvas_resize(self, event):
+        if self.current_image:
+            self.show_image(self.current_image, fast=True)
+            self.resize_debouncer.trigger()
+
+    def on_resize_settled(self):
         if self.current_image:
             self.show_image(self.current_image)
 
@@ -260,6 +302,7 @@ class OCRApp:
             # 倒序删除避免索引变化问题
             for index in reversed(selection):
                 del self.images[index]
+            self.ocr_worker.cancel()
 
             self.update_image_list()
 
@@ -278,6 +321,9 @@ class OCRApp:
 
         if messagebox.askyesno("确认", "确定要清空所有文件吗？"):
             self.images.clear()
+            self.ocr_worker.cancel()
+            self.page_cache.discard()
+            self.scaled_cache.clear()
             self.update_image_list()
             self.current_image = None
             self.canvas.delete("all")
@@ -1,54 +1,37 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import time
+import queue
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from PIL import Image, ImageTk
-import numpy as np
-import cv2
-from pdf2image import convert_from_path
-import paddleocr
-import os
-import tempfile
+from PIL import ImageTk
+from core.engine_pool import get_engine_pool, WARM_UP_DELAY_MS
+from core.region_ocr import RegionRecognizer
+from core.page_source import list_pages
+from core.page_cache import PageCache, TIER_PREVIEW, TIER_FULL
+from core.prefetch import PagePrefetcher
+from core.display_scale import ScaledImageCache, Debouncer
+from core import metrics
+from ocr_related.stats_window import StatsWindow
+from core.pipeline import recognize_refs
+from core.text_layer import get_text_layer
+from core.preprocess import Preprocessor, PROFILE_AUTO, PROFILE_LABELS
+from core.result_cache import get_result_cache
+from core import excel_writer
+from core.templates import (save_template, load_template, list_templates, template_path, template_regions,
+                            normalize_regions, scale_regions, TEMPLATE_DIR)
+from core.alignment import get_aligner
+from core.template_index import TemplateIndex
 from datetime import datetime
-import pandas as pd
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
 import re
 import unicodedata
 
 class ImageProcessor:
     @staticmethod
-    def process_files(file_paths, output_size=(1600, 1200)):
-        """处理输入文件并返回图片列表及元数据"""
-        images = []
-        file_info = []
-        for path in file_paths:
-            if path.lower().endswith('.pdf'):
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    poppler_path = r"poppler/Library/bin"  # 根据实际路径修改
-                    pages = convert_from_path(
-                        path,
-                        dpi=300,
-                        output_folder=temp_dir,
-                        poppler_path=poppler_path
-                    )
-                    for i, page in enumerate(pages):
-                        img = page.resize(output_size, Image.Resampling.LANCZOS)
-                        images.append(img)
-                        file_info.append({
-                            'filename': os.path.basename(path),
-                            'filepath': path,
-                            'page': i + 1
-                        })
-            else:
-                img = Image.open(path)
-                img = img.resize(output_size, Image.Resampling.LANCZOS)
-                images.append(img)
-                file_info.append({
-                    'filename': os.path.basename(path),
-                    'filepath': path,
-                    'page': None
-                })
-        return images, file_info
+    def list_pages(file_paths):
+        """列出输入文件的所有页面引用及元数据（只读取页数，不解码图像）"""
+        return list_pages(file_paths)
 
 
 class InvoiceProcessorApp:
@@ -57,16 +40,40 @@ class InvoiceProcessorApp:
         self.root.title("小苏专用发票识别系统❤")
 
         # 初始化变量
-        self.images = []
+        self.images = []  # PageRef 列表，图像由 page_cache 按需渲染
         self.file_info = []
         self.current_image_index = 0
         self.regions = []  # 存储原始坐标区域
         self.rect_ids = []  # 存储画布矩形对象ID
         self.scale_factor = (1, 1)
         self.output_size = (1600, 1200)
-
-        # 初始化OCR
-        self.ocr = paddleocr.PaddleOCR(use_gpu=False,cls_model_dir=".\ocrModel\cls\ch",det_model_dir=".\ocrModel\det\ch",rec_model_dir=".\ocrModel\\rec\ch",use_angle_cls=True, lang='ch')
+        # 原图层统一缩放到 output_size，预览层仅用于画布显示
+        self.page_cache = PageCache(target_size=self.output_size)
+        # 翻页时后台预取相邻页（原图层已缩放到 output_size，一并预取供单页识别使用）
+        self.prefetcher = PagePrefetcher(self.page_cache, tiers=(TIER_PREVIEW, TIER_FULL))
+        # 画布显示图按目标尺寸缓存，画框/撤销重绘时不再重复缩放
+        self.scaled_cache = ScaledImageCache()
+        self.display_key = None
+        self.resize_debouncer = Debouncer(self.root, self.show_image)
+
+        # 初始化OCR（共享引擎池，窗口显示后再后台预热，批量识别模块一并预先导入）
+        self.ocr_pool = get_engine_pool()
+        self.root.after(WARM_UP_DELAY_MS, self.ocr_pool.warm_up_async, 1, ('core.batch_engine',))
+        self.recognizer = RegionRecognizer(self.ocr_pool, use_cls=True)
+        self.result_cache = get_result_cache()  # 重复识别同一区域时直接读取缓存
+        self.text_layer = get_text_layer()  # 电子版 PDF 直接读取文字层
+        self.preprocess_profile = tk.StringVar(value=PROFILE_LABELS[PROFILE_AUTO])
+        self.batch_engine = None
+        self.batch_writer = None
+        # 当前模板：带参考图时识别前逐页对齐区域，对齐结果按页缓存供画布显示
+        self.template = None
+        self.template_name = tk.StringVar()
+        self.align_enabled = tk.BooleanVar(value=True)
+        self.aligned_regions = {}
+        # 自动匹配模板：混合版面时每页按指纹选择模板，批量识别一次处理完
+        self.auto_template = tk.BooleanVar(value=False)
+        self.template_index = None
+        self.page_templates = {}  # PageRef -> 匹配到的模板（None 表示未匹配）
 
         # 创建界面
         self.create_widgets()
@@ -82,6 +89,15 @@ class InvoiceProcessorApp:
 
         self.btn_process_single = ttk.Button(toolbar, text="识别当前文件", command=self.process_current)
         self.btn_process_single.pack(side=tk.LEFT, padx=5)
+
+        tk.Label(toolbar, text="预处理:", font=('微软雅黑', 9)).pack(side=tk.LEFT)
+        ttk.Combobox(toolbar, textvariable=self.preprocess_profile, state='readonly', width=10,
+                     values=list(PROFILE_LABELS.values())).pack(side=tk.LEFT, padx=5)
+
+        self.progress = ttk.Progressbar(toolbar, length=200, mode='determinate')
+        self.progress.pack(side=tk.LEFT, padx=5)
+        self.status_label = tk.Label(toolbar, text="", font=('微软雅黑', 9))
+        self.status_label.pack(side=tk.LEFT, padx=5)
         # 主布局框架
         main_frame = tk.PanedWindow(self.root, orient=tk.HORIZONTAL)
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -111,9 +127,20 @@ class InvoiceProcessorApp:
 
         ttk.Button(toolbar, text="打开文件", command=self.open_files).pack(side=tk.LEFT, padx=5)
         ttk.Button(toolbar, text="撤销区域", command=self.undo_region).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="保存模板", command=self.save_region_template).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="加载模板", command=self.load_region_template).pack(side=tk.LEFT, padx=5)
+        self.template_box = ttk.Combobox(toolbar, textvariable=self.template_name, state='readonly', width=14,
+                                         postcommand=self.refresh_template_list)
+        self.template_box.pack(side=tk.LEFT, padx=5)
+        self.template_box.bind('<<ComboboxSelected>>', self.on_template_select)
+        ttk.Checkbutton(toolbar, text="自动对齐", variable=self.align_enabled,
+                        command=self.on_align_toggle).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(toolbar, text="自动匹配模板", variable=self.auto_template,
+                        command=self.on_auto_template_toggle).pack(side=tk.LEFT, padx=5)
         ttk.Button(toolbar, text="上一张", command=lambda: self.change_image(-1)).pack(side=tk.LEFT, padx=5)
         ttk.Button(toolbar, text="下一张", command=lambda: self.change_image(1)).pack(side=tk.LEFT, padx=5)
         ttk.Button(toolbar, text="开始识别", command=self.process_all).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="性能统计", command=lambda: StatsWindow(self.root)).pack(side=tk.LEFT, padx=5)
 
         # 图像显示区
         self.canvas_frame = tk.Frame(right_panel)
@@ -144,6 +171,7 @@ class InvoiceProcessorApp:
         self.canvas.bind("<ButtonPress-1>", self.start_rectangle)
         self.canvas.bind("<B1-Motion>", self.draw_rectangle)
         self.canvas.bind("<ButtonRelease-1>", self.save_rectangle)
+        self.canvas.bind("<Configure>", self.on_canvas_resize)
 
     def open_files(self):
         file_types = [('PDF/图像文件', '*.pdf *.jpg *.jpeg *.png')]
@@ -152,10 +180,14 @@ class InvoiceProcessorApp:
             return
 
         try:
-            self.images, self.file_info = ImageProcessor.process_files(file_paths, self.output_size)
+            self.images, self.file_info = ImageProcessor.list_pages(file_paths)
             self.current_image_index = 0
+            self.aligned_regions.clear()
+            self.page_templates.clear()
             self.update_file_list()
             self.show_image()
+            self.prefetcher.cancel()
+            self.prefetcher.navigate(self.images, 0)
         except Exception as e:
             messagebox.showerror("错误", f"文件处理失败: {str(e)}")
 
@@ -175,8 +207,15 @@ class InvoiceProcessorApp:
         if selection:
             self.current_image_index = selection[0]
             self.show_image()
+            self.prefetcher.navigate(self.images, self.current_image_index)
 
-    def show_image(self):
+    def on_canvas_resize(self, event):
+        """拖动窗口时快速缩放，停止后再高质量重绘"""
+        if self.images:
+            self.show_image(fast=True)
+            self.resize_debouncer.trigger()
+
+    def show_image(self, fast=False):
         """显示当前图片并重绘所有区域"""
         if not self.images:
             return
@@ -190,28 +229,36 @@ class InvoiceProcessorApp:
         self.canvas.delete("all")
         self.rect_ids.clear()
 
-        # 获取当前图片
-        img_pil = self.images[self.current_image_index]
+        # 获取当前图片（预览层），坐标仍以 output_size 为准
+        ref = self.images[self.current_image_index]
+        with metrics.timer('ui.load_preview'):
+            img_pil = self.page_cache.get_preview(ref)
 
         # 计算缩放比例
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
-        img_width, img_height = img_pil.size
+        img_width, img_height = self.output_size
         ratio = min(canvas_width / img_width,
                     canvas_height / img_height) if canvas_width > 0 and canvas_height > 0 else 1
-        new_size = (int(img_width * ratio), int(img_height * ratio))
+        new_size = (max(1, int(img_width * ratio)), max(1, int(img_height * ratio)))
 
         # 保存缩放比例
         self.scale_factor = (img_width / new_size[0], img_height / new_size[1])
 
         # 显示图片
-        img_resized = img_pil.resize(new_size, Image.Resampling.LANCZOS)
-        self.tk_image = ImageTk.PhotoImage(img_resized)
+        display_key = (ref, new_size, fast)
+        if display_key != self.display_key:
+            img_resized = self.scaled_cache.get(ref, img_pil, new_size, fast=fast)
+            self.tk_image = ImageTk.PhotoImage(img_resized)
+            self.display_key = display_key
         self.canvas.create_image(0, 0, anchor=tk.NW, image=self.tk_image)
         self.canvas.config(scrollregion=(0, 0, new_size[0], new_size[1]))
 
-        # 重绘所有区域
-        for region in self.regions:
+        if self.auto_template.get():
+            self.route_page(ref, img_pil)
+
+        # 重绘所有区域（开启对齐时显示本页校正后的位置）
+        for region in self.regions_for_page(ref, img_pil):
             x0, y0, x1, y1 = region
             # 转换到画布坐标
             x0_canvas = x0 / self.scale_factor[0]
@@ -226,11 +273,132 @@ class InvoiceProcessorApp:
 
     def undo_region(self):
         """撤销最后一个区域"""
+        self.detach_template()
         if self.regions:
             self.regions.pop()
             self.region_list.delete(tk.END)
             self.show_image()  # 重绘更新
 
+    def save_region_template(self):
+        """把当前区域保存为模板（命令行批量模式可直接使用）"""
+        if not self.regions:
+            messagebox.showwarning("警告", "请先框选识别区域")
+            return
+        os.makedirs(TEMPLATE_DIR, exist_ok=True)
+        path = filedialog.asksaveasfilename(
+            initialdir=TEMPLATE_DIR, defaultextension='.json', filetypes=[('区域模板', '*.json')])
+        if not path:
+            return
+        # 当前页作为参考图一起保存，之后识别其他页时按它对齐
+        reference = self.page_cache.get_preview(self.images[self.current_image_index]) if self.images else None
+        try:
+            save_template(path, self.regions, self.output_size, reference=reference)
+        except Exception as e:
+            messagebox.showerror("错误", f"模板保存失败: {str(e)}")
+            return
+        self.apply_template(path)
+        if self.auto_template.get():
+            self.load_template_index()  # 新模板立即参与自动匹配
+
+    def load_region_template(self):
+        """加载区域模板替换当前区域"""
+        path = filedialog.askopenfilename(initialdir=TEMPLATE_DIR, filetypes=[('区域模板', '*.json')])
+        if path:
+            self.apply_template(path)
+
+    def refresh_template_list(self):
+        self.template_box['values'] = [name for name, _ in list_templates()]
+
+    def on_template_select(self, event):
+        self.apply_template(template_path(self.template_name.get()))
+
+    def apply_template(self, path):
+        """使用模板的区域（比例坐标换算到 output_size）"""
+        try:
+            template = load_template(path)
+        except Exception as e:
+            messagebox.showerror("错误", f"模板读取失败: {str(e)}")
+            return
+        self.use_template(template)
+        self.show_image()
+
+    def use_template(self, template):
+        """切换当前模板（不重绘）"""
+        self.template = template
+        self.template_name.set(template['name'])
+        self.aligned_regions.clear()
+        self.regions = template_regions(template, self.output_size)
+        self.refresh_region_list()
+
+    def detach_template(self):
+        """手动修改区域前调用：以本页对齐后的位置作为新区域，之后不再按模板参考图对齐"""
+        self.auto_template.set(False)  # 手动编辑区域后不再按页切换模板
+        if self.template is None:
+            return
+        if self.images:
+            self.regions = list(self.aligned_regions.get(self.images[self.current_image_index], self.regions))
+            self.refresh_region_list()
+        self.template = None
+        self.template_name.set("")
+        self.aligned_regions.clear()
+
+    def refresh_region_list(self):
+        self.region_list.delete(0, tk.END)
+        for i, (x0, y0, x1, y1) in enumerate(self.regions):
+            self.region_list.insert(tk.END, f"区域{i + 1}: ({x0}, {y0}) - ({x1}, {y1})")
+
+    def load_template_index(self):
+        """读取模板目录中带参考图的模板建立指纹索引，返回模板数"""
+        self.template_index = TemplateIndex.from_directory(TEMPLATE_DIR)
+        self.page_templates.clear()
+        return len(self.template_index)
+
+    def on_auto_template_toggle(self):
+        if self.auto_template.get() and not self.load_template_index():
+            messagebox.showwarning("警告", "模板目录中没有可自动匹配的模板，请先框选区域并保存模板")
+            self.auto_template.set(False)
+            return
+        self.show_image()
+
+    def route_page(self, ref, img_pil):
+        """按预览图指纹为该页选择模板（结果按页缓存），模板变化时切换区域"""
+        if ref not in self.page_templates:
+            self.page_templates[ref] = self.template_index.classify(img_pil)
+        template = self.page_templates[ref]
+        if template is None:
+            self.status_label.config(text="当前页未匹配到模板")
+            return
+        if self.template is None or self.template['name'] != template['name']:
+            self.use_template(template)
+        self.status_label.config(text=f"当前页模板：{template['name']}")
+
+    def on_align_toggle(self):
+        self.aligned_regions.clear()
+        self.show_image()
+
+    def alignment_reference(self):
+        """已加载带参考图的模板且开启自动对齐时，返回参考图路径"""
+        if self.template is None or not self.align_enabled.get():
+            return None
+        return self.template['reference']
+
+    def regions_for_page(self, ref, img_pil):
+        """该页上的区域（output_size 坐标）：开启对齐时在预览图上估计偏移，结果按页缓存"""
+        reference = self.alignment_reference()
+        if reference is None:
+            return self.regions
+        regions = self.aligned_regions.get(ref)
+        if regions is None:
+            try:
+                aligned = get_aligner(reference).align_regions(
+                    img_pil, normalize_regions(self.regions, self.output_size))
+                regions = scale_regions(aligned, self.output_size)
+            except Exception as e:
+                print(f"区域对齐失败：{str(e)}")
+                regions = self.regions
+            self.aligned_regions[ref] = regions
+        return regions
+
     def change_image(self, delta):
         """切换图片"""
         if not self.images:
@@ -240,6 +408,7 @@ class InvoiceProcessorApp:
         if 0 <= new_index < len(self.images):
             self.current_image_index = new_index
             self.show_image()
+            self.prefetcher.navigate(self.images, new_index)
 
     def start_rectangle(self, event):
         self.rect_start = (event.x, event.y)
@@ -254,6 +423,7 @@ class InvoiceProcessorApp:
         self.rect_id = self.canvas.create_rectangle(x0, y0, x1, y1, outline='red', width=2)
 
     def save_rectangle(self, event):
+        self.detach_template()
         x0, y0 = self.rect_start
         x1, y1 = event.x, event.y
 
@@ -271,63 +441,136 @@ class InvoiceProcessorApp:
         self.region_list.insert(tk.END, f"区域{len(self.regions)}: ({x0_raw}, {y0_raw}) - ({x1_raw}, {y1_raw})")
 
     def process_all(self):
-        """批量处理所有文件"""
+        """批量处理所有文件（多进程并行，界面不阻塞，结果按页顺序流式写入Excel）"""
         if not self.validate_ready():
             return
+        if self.batch_engine and self.batch_engine.is_running():
+            messagebox.showwarning("警告", "批量识别正在进行中")
+            return
 
         # 批量模式仍使用时间戳目录
         output_folder = self.create_output_folder(mode='batch')
         output_path = os.path.join(output_folder, "批量识别结果.xlsx")
+        routed = self.auto_template.get()
+        if routed:
+            headers = excel_writer.routed_headers(self.template_index.max_region_count())
+        else:
+            headers = excel_writer.result_headers(len(self.regions))
+        try:
+            self.batch_writer = excel_writer.StreamingExcelWriter(output_path, headers)
+        except Exception as e:
+            messagebox.showerror("保存失败", f"文件保存失败：{str(e)}\n尝试路径：{output_path}")
+            return
+
+        self.batch_pending = {}  # 提前完成、尚未轮到写入的页
+        self.batch_next = 0
+        self.batch_done = 0
+        self.progress.configure(maximum=len(self.images), value=0)
+        self.btn_process_all.configure(state=tk.DISABLED)
+        self.status_label.config(text="正在启动识别进程...")
+
+        from core.batch_engine import BatchEngine
+        self.batch_engine = BatchEngine(target_size=self.output_size,
+                                        preprocess=self.selected_profile())
+        if routed:
+            # 每页自动匹配模板，各页按各自模板的区域识别
+            self.batch_engine.start(self.images, self.regions, template_dir=TEMPLATE_DIR,
+                                    align=self.align_enabled.get())
+        else:
+            self.batch_engine.start(self.images, self.regions, self.alignment_reference())
+        self.root.after(100, self.poll_batch_progress)
 
-        results = []
-        for idx, img_pil in enumerate(self.images):
-            result_row = self.process_single_image(img_pil)
-            results.append(result_row)
+    def poll_batch_progress(self):
+        """轮询进度队列，把子进程结果按页顺序写入Excel"""
+        finished = False
+        error = None
+        try:
+            while True:
+                message = self.batch_engine.progress_queue.get_nowait()
+                if message[0] == 'result':
+                    _, index, row = message
+                    self.batch_pending[index] = row
+                    self.batch_done += 1
+                    self.flush_batch_rows()
+                    self.progress.configure(value=self.batch_done)
+                    self.status_label.config(text=f"已识别 {self.batch_done}/{len(self.images)}")
+                elif message[0] == 'done':
+                    _, total, elapsed = message
+                    self.status_label.config(
+                        text=f"完成 {total} 页，{total / elapsed if elapsed else 0:.2f} 页/秒")
+                    finished = True
+                else:
+                    error = message[1]
+                    finished = True
+        except queue.Empty:
+            pass
+
+        if not finished:
+            self.root.after(100, self.poll_batch_progress)
+            return
 
-        self.save_results(results, output_path)
+        self.btn_process_all.configure(state=tk.NORMAL)
+        lost = 0
+        if error is not None:
+            # 失败页之后已完成的页仍在暂存区，按页序补齐缺失的页后全部写出
+            lost = self.flush_batch_rows(fill_missing=f"识别失败：{error}")
+        try:
+            output_path = self.batch_writer.close()
+        except Exception as e:
+            messagebox.showerror("保存失败", f"文件保存失败：{str(e)}\n尝试路径：{self.batch_writer.output_path}")
+            return
+        if error is not None:
+            self.status_label.config(text=f"批量识别失败，{lost} 页未识别")
+            messagebox.showerror("错误",
+                                 f"批量识别失败：{error}\n已写入{len(self.images) - lost}页，"
+                                 f"{lost}页未识别（已标记失败），结果保存至：\n{output_path}")
+            return
         messagebox.showinfo("完成",
-                            f"已处理{len(results)}个文件，结果保存至：\n{os.path.abspath(output_path)}")
-
-    def preprocess_image(self, image):
-        """图像预处理增强识别效果"""
-        # 转为灰度图
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        # 自适应二值化
-        thresh = cv2.adaptiveThreshold(gray, 255,
-                                       cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                       cv2.THRESH_BINARY, 11, 2)
-        # 降噪
-        denoised = cv2.fastNlMeansDenoising(thresh, h=10)
-        # 转为三通道
-        return cv2.cvtColor(denoised, cv2.COLOR_GRAY2BGR)
+                            f"已处理{self.batch_writer.rows_written}个文件，结果保存至：\n{output_path}")
+
+    def flush_batch_rows(self, fill_missing=None):
+        """写入已连续完成的页（只写模式必须按顺序追加）
+
+        fill_missing 不为空时（批量识别中途失败）写出剩余所有页，没有结果的页写入该提示，返回缺失的页数。
+        """
+        end = len(self.images) if fill_missing is not None else None
+        missing = 0
+        while self.batch_next in self.batch_pending or (end is not None and self.batch_next < end):
+            row = self.batch_pending.pop(self.batch_next, None)
+            if row is None:
+                row = [fill_missing]
+                missing += 1
+            info = self.file_info[self.batch_next] if self.batch_next < len(self.file_info) else {}
+            self.batch_writer.write_row(excel_writer.result_row(info, row))
+            self.batch_next += 1
+        return missing
+
+    def selected_profile(self):
+        """界面选择的预处理方案"""
+        label = self.preprocess_profile.get()
+        for profile, text in PROFILE_LABELS.items():
+            if text == label:
+                return profile
+        return PROFILE_AUTO
 
     def validate_ready(self):
         """验证是否准备好进行识别"""
         if not self.images:
             messagebox.showwarning("警告", "请先选择需要处理的文件")
             return False
-        if not self.regions:
+        if not self.regions and not self.auto_template.get():
             messagebox.showwarning("警告", "请先框选识别区域")
             return False
         return True
 
-    def process_single_image(self, img_pil):
-        """处理单个图片并返回识别结果"""
-        img_cv = cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
-        row = []
-        for region in self.regions:
-            x0, y0, x1, y1 = region
-            roi = img_cv[y0:y1, x0:x1]
-            roi = self.preprocess_image(roi)
-
-            try:
-                result = self.ocr.ocr(roi, cls=True)
-                text = ' '.join([line[1][0] for line in result[0]]) if result[0] else ''
-            except Exception as e:
-                text = f"识别错误: {str(e)}"
-
-            row.append(text)
-        return row
+    def process_refs(self, refs):
+        """按页面引用处理：有文字层的区域直接取文字，其余区域才渲染并OCR"""
+        preprocessor = Preprocessor(self.selected_profile())
+        reference = self.alignment_reference()
+        rows = recognize_refs(self.recognizer, refs, self.regions, self.page_cache.get_full,
+                              self.output_size, preprocessor, self.result_cache, self.text_layer,
+                              get_aligner(reference) if reference else None)
+        return rows
 
     def run(self):
         self.root.mainloop()
@@ -390,56 +633,7 @@ class InvoiceProcessorApp:
     def save_results(self, data, output_path):
         """增强的文件保存验证"""
         try:
-            # 验证路径长度
-            if len(output_path) > 200:
-                raise ValueError("文件路径超过Windows系统限制")
-
-            # 强制添加正确扩展名
-            if not output_path.lower().endswith('.xlsx'):
-                output_path += '.xlsx'
-
-            # 创建父目录
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-            # 使用绝对路径
-            output_path = os.path.abspath(output_path)
-
-            # ... 原有保存逻辑保持不变 ...
-            headers = ["文件名", "文件路径", "页码"] + [f"区域{i + 1}" for i in range(len(self.regions))]
-
-            rows = []
-            for idx, row in enumerate(data):
-                info = self.file_info[idx] if idx < len(self.file_info) else {}
-                rows.append([
-                    info.get('filename', '未知文件'),
-                    info.get('filepath', '未知路径'),
-                    info.get('page', 'N/A'),
-                    *row
-                ])
-
-            df = pd.DataFrame(rows, columns=headers)
-
-            # 使用openpyxl引擎写入Excel
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='识别结果')
-
-                # 获取工作表对象进行格式设置
-                worksheet = writer.sheets['识别结果']
-
-                # 设置标题格式
-                header_font = Font(bold=True, color="FFFFFF")
-                header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-
-                for col in range(1, len(headers) + 1):
-                    cell = worksheet.cell(row=1, column=col)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    worksheet.column_dimensions[get_column_letter(col)].width = 25
-
-                # 设置文本自动换行
-                for row in worksheet.iter_rows(min_row=2):
-                    for cell in row:
-                        cell.alignment = Alignment(wrap_text=True, vertical='top')
+            excel_writer.save_results(data, self.file_info, len(self.regions), output_path)
         except Exception as e:
             messagebox.showerror("保存失败", f"文件保存失败：{str(e)}\n尝试路径：{output_path}")
 
@@ -457,8 +651,8 @@ class InvoiceProcessorApp:
         base_name = f"{self.generate_filename(file_info)}_{timestamp}"
         output_path = os.path.join(output_folder, f"{base_name}.xlsx")
 
-        img_pil = self.images[self.current_image_index]
-        result_row = self.process_single_image(img_pil)
+        with metrics.timer('ui.process_current'):
+            result_row = self.process_refs([self.images[self.current_image_index]])[0]
 
         self.save_results([result_row], output_path)
 
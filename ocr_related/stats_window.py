@@ -0,0 +1,61 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from core import metrics
+
+
+class StatsWindow:
+    """tkinter 版性能统计窗口：每秒刷新 core.metrics，可导出 JSON/CSV"""
+
+    COLUMNS = [("name", "名称", 260), ("kind", "类型", 80), ("count", "次数", 70),
+               ("total", "总计", 80), ("mean", "平均", 80), ("p95", "p95", 80), ("max", "最大", 80)]
+
+    def __init__(self, master):
+        self.window = tk.Toplevel(master)
+        self.window.title("性能统计")
+        self.window.geometry("780x400")
+
+        self.tree = ttk.Treeview(self.window, columns=[key for key, _, _ in self.COLUMNS], show='headings')
+        for key, title, width in self.COLUMNS:
+            self.tree.heading(key, text=title)
+            self.tree.column(key, width=width, anchor=tk.W if key == 'name' else tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        toolbar = ttk.Frame(self.window)
+        toolbar.pack(fill=tk.X, padx=5, pady=5)
+        self.enabled = tk.BooleanVar(value=metrics.enabled())
+        ttk.Checkbutton(toolbar, text="启用统计", variable=self.enabled,
+                        command=lambda: metrics.enable(self.enabled.get())).pack(side=tk.LEFT)
+        ttk.Button(toolbar, text="导出", command=self.export).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(toolbar, text="清零", command=lambda: (metrics.reset(), self.refresh())).pack(side=tk.RIGHT)
+
+        self.refresh()
+
+    @staticmethod
+    def _format(stats, key):
+        value = stats.get(key)
+        if value is None:
+            return ""
+        if stats['kind'] == metrics.KIND_TIMER and key != 'count':
+            return f"{value:.2f}s" if key == 'total' else f"{value * 1000:.1f}ms"
+        return f"{value:g}" if isinstance(value, float) else str(value)
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        for name, stats in metrics.snapshot().items():
+            values = [name, stats['kind']] + [self._format(stats, key) for key, _, _ in self.COLUMNS[2:]]
+            self.tree.insert('', tk.END, values=values)
+        self.window.after(1000, self.refresh)
+
+    def export(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.window, defaultextension=".json", initialfile="metrics.json",
+            filetypes=[("JSON文件", "*.json"), ("CSV文件", "*.csv")])
+        if not path:
+            return
+        try:
+            metrics.export(path)
+        except Exception as e:
+            messagebox.showerror("错误", f"导出失败: {str(e)}", parent=self.window)
@@ -1,18 +1,22 @@
-import datetime
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QListWidget, QLabel, QPushButton, QFileDialog,
-    QMessageBox, QScrollArea, QInputDialog, QTableWidgetItem, QListWidgetItem, QTableWidget, QLineEdit
+    QMessageBox, QScrollArea, QInputDialog, QListWidgetItem, QTableWidget
 )
 from PyQt5.QtCore import QTimer, Qt
-from PyQt5.QtGui import QImage, QPixmap, QIcon
-from paddleocr import paddleocr
-from pdf2image import convert_from_path
-from PIL import Image
-import pandas as pd
+from PyQt5.QtGui import QPixmap, QIcon
 from widgets.graphics_view import GraphicsView
 from widgets.editable_table import EditableTable
-from core.ocr_thread import OCRThread
+from core import metrics
+from core.engine_pool import get_engine_pool, WARM_UP_DELAY_MS
+from core.page_loader import PageLoaderThread, ThumbnailService
+from core.page_source import display_name
+from core.page_cache import PageCache
+from core.prefetch import PagePrefetcher
+from core.autosave import AutosaveJournal
+from core.excel_writer import write_table
+from core.templates import save_template, load_template, list_templates, template_path
+from core.alignment import get_aligner
 
 
 class MainWindow(QMainWindow):
@@ -37,6 +41,9 @@ class MainWindow(QMainWindow):
         self.open_btn = QPushButton("打开文件")
         self.recognize_btn = QPushButton("识别区域")
         self.export_btn = QPushButton("导出表格")
+        self.stats_btn = QPushButton("性能统计")
+        self.save_template_btn = QPushButton("保存模板")
+        self.load_template_btn = QPushButton("加载模板")
 
     def _setup_layout(self):
         main_widget = QWidget()
@@ -75,20 +82,46 @@ class MainWindow(QMainWindow):
         btn_layout.addWidget(self.open_btn)
         btn_layout.addWidget(self.recognize_btn)
         btn_layout.addWidget(self.export_btn)
+        btn_layout.addWidget(self.stats_btn)
         layout.addLayout(btn_layout)
+        template_layout = QHBoxLayout()
+        template_layout.addWidget(self.save_template_btn)
+        template_layout.addWidget(self.load_template_btn)
+        layout.addLayout(template_layout)
 
         scroll.setWidget(content)
         scroll.setWidgetResizable(True)
         return scroll
 
     def _setup_data(self):
-        self.current_image = None
-        self.images = []
+        self.current_image = None  # 当前页预览图
+        self.current_ref = None
+        self.images = []  # PageRef 列表，页面按需渲染
+        self.page_cache = PageCache()  # 预览/原图两级缓存，内存占用有上限
+        self.prefetcher = PagePrefetcher(self.page_cache)  # 后台预取相邻页的预览
+        self.page_items = {}  # PageRef -> [QListWidgetItem]
+        self.page_loaders = []
+        # 缩略图在线程池中低分辨率渲染并缓存到磁盘，图标异步填充
+        self.thumbnail_service = ThumbnailService(parent=self)
+        self.thumbnail_service.thumbnail_ready.connect(self.set_file_thumbnail)
+        self.thumbnail_service.error_occurred.connect(self.handle_thumbnail_error)
         self.current_regions = []
         self.field_names = []
+        self.template = None  # 已加载的模板：换页时按参考图对齐后重画区域
         self.ocr_thread = None
+        # 窗口显示后再后台预热共享OCR引擎，首次识别时无需等待模型加载
+        QTimer.singleShot(WARM_UP_DELAY_MS, self._warm_up)
+
+    def _warm_up(self):
+        # 识别线程依赖 numpy/结果缓存等较重的模块，与引擎一起在后台导入
+        get_engine_pool().warm_up_async(modules=('core.ocr_thread',))
 
     def _setup_autosave(self):
+        # 增量自动保存：只追加变化的行，定期压缩为单个恢复文件
+        self.autosave_journal = AutosaveJournal()
+        self._journal_cleared = False  # 日志清空后下一次自动保存需写完整快照
+        self._unexported = False  # 上次导出后表格是否有变化
+        QTimer.singleShot(0, self._offer_recovery)
         self.autosave_timer = QTimer()
         self.autosave_timer.timeout.connect(self.auto_save)
         self.autosave_timer.start(30000)
@@ -99,6 +132,9 @@ class MainWindow(QMainWindow):
         self.open_btn.clicked.connect(self.open_files)
         self.recognize_btn.clicked.connect(self.start_ocr)
         self.export_btn.clicked.connect(self.export_table)
+        self.stats_btn.clicked.connect(self.show_stats)
+        self.save_template_btn.clicked.connect(self.save_region_template)
+        self.load_template_btn.clicked.connect(self.load_region_template)
         self.table.horizontalHeader().sectionDoubleClicked.connect(self.edit_header)
 
     # 以下为业务逻辑方法（内容与之前版本类似，但需要适配新的模块化结构）
@@ -134,11 +170,11 @@ class MainWindow(QMainWindow):
         # 新增方法：编辑表头
 
     def edit_header(self, section):
-        old_name = self.table.horizontalHeaderItem(section).text()
+        old_name = self.table.headers()[section]
         new_name, ok = QInputDialog.getText(
             self, "编辑字段名称", "输入新字段名称：", text=old_name)
         if ok and new_name:
-            self.table.setHorizontalHeaderItem(section, QTableWidgetItem(new_name))
+            self.table.set_header(section, new_name)
             if section < len(self.field_names):
                 self.field_names[section] = new_name
 
@@ -153,45 +189,174 @@ class MainWindow(QMainWindow):
         if not paths:
             return
 
-        for path in paths:
-            if path.lower().endswith('.pdf'):
-                images = convert_from_path(path, poppler_path=r"poppler/Library/bin", dpi=300)
-                for img in images:
-                    self.images.append((path, img))
-                    self.add_file_item(path, img)
-            else:
-                img = Image.open(path)
-                self.images.append((path, img))
-                self.add_file_item(path, img)
-
-    def add_file_item(self, path, img):
-        thumb = img.copy()
-        thumb.thumbnail((100, 100))
-        qimg = QImage(thumb.tobytes(), thumb.width, thumb.height,
-                      thumb.width * 3, QImage.Format_RGB888)
-        item = QListWidgetItem(QIcon(QPixmap.fromImage(qimg)), path)
+        # 页数在后台线程读取，列表项逐页出现，缩略图随后异步填充
+        loader = PageLoaderThread(paths)
+        loader.page_found.connect(self.add_file_item)
+        loader.error_occurred.connect(self.handle_load_error)
+        loader.finished.connect(lambda: self.page_loaders.remove(loader))
+        self.page_loaders.append(loader)
+        loader.start()
+
+    def add_file_item(self, ref):
+        self.images.append(ref)
+        item = QListWidgetItem(display_name(ref))
+        self.page_items.setdefault(ref, []).append(item)
         self.file_list.addItem(item)
+        self.thumbnail_service.request(ref)
+
+    def set_file_thumbnail(self, ref, qimg):
+        icon = QIcon(QPixmap.fromImage(qimg))
+        for item in self.page_items.get(ref, []):
+            item.setIcon(icon)
+
+    def handle_load_error(self, path, error_msg):
+        QMessageBox.critical(self, "错误", f"文件读取失败: {path}\n{error_msg}")
+
+    def handle_thumbnail_error(self, path, error_msg):
+        # 缩略图失败不影响使用，不弹窗打断
+        print(f"缩略图生成失败：{path} {error_msg}")
+
+    def show_stats(self):
+        if not hasattr(self, 'stats_panel'):
+            from widgets.stats_panel import StatsPanel
+            self.stats_panel = StatsPanel(self)
+        self.stats_panel.show()
+        self.stats_panel.raise_()
+
+    def closeEvent(self, event):
+        if (self._unexported or self.table.is_dirty()) and self.table.rowCount():
+            reply = QMessageBox.question(
+                self, "退出", "未导出的数据将丢失，是否导出？",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
+            if reply == QMessageBox.Cancel:
+                event.ignore()
+                return
+            if reply == QMessageBox.Yes:
+                self.export_table()
+                if self._unexported:  # 导出取消或失败时不退出
+                    event.ignore()
+                    return
+        # 数据已导出或用户确认放弃，不再需要恢复数据
+        self.autosave_timer.stop()
+        self.autosave_journal.clear()
+        for loader in self.page_loaders:
+            loader.stop()
+        # 加载线程在当前文件处理完后退出，须等待结束再销毁
+        for loader in self.page_loaders:
+            loader.wait()
+        self.thumbnail_service.shutdown()
+        self.prefetcher.stop()
+        # 识别线程由窗口持有，须等它在当前批次结束后退出，避免销毁运行中的 QThread
+        self.cancel_ocr()
+        if self.ocr_thread is not None:
+            self.ocr_thread.wait()
+        super().closeEvent(event)
 
     def handle_error(self, error_msg):
         QMessageBox.critical(self, "识别错误", f"发生错误：\n{error_msg}")
         self.export_table(autosave=True)
 
     def auto_save(self):
-        if self.table.rowCount() > 0:
-            self.export_table(autosave=True)
+        if not self.table.is_dirty():
+            return
+        rows, structure_changed, headers_changed = self.table.take_dirty()
+        self._unexported = True
+        try:
+            self.autosave_journal.record(
+                self.table.headers(), self.table.rowCount(), rows, self.table.row_values,
+                structure_changed=structure_changed or self._journal_cleared, headers_changed=headers_changed)
+            self._journal_cleared = False
+        except Exception as e:
+            print(f"自动保存失败：{str(e)}")
+
+    def _offer_recovery(self):
+        """启动时发现上次未正常结束留下的自动保存数据，询问是否恢复"""
+        if not self.autosave_journal.has_data():
+            return
+        try:
+            headers, rows = self.autosave_journal.recover()
+        except Exception as e:
+            print(f"读取自动保存数据失败：{str(e)}")
+            return
+        if not rows:
+            self.autosave_journal.clear()
+            return
+        reply = QMessageBox.question(
+            self, "恢复数据", f"发现上次自动保存的 {len(rows)} 行数据，是否恢复？",
+            QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            self.autosave_journal.clear()
+            return
+
+        self.table.load_rows(headers, rows)
+        self._unexported = True
+        self.field_names = list(headers)
 
     def load_image(self):
         try:
             idx = self.file_list.currentRow()
             if 0 <= idx < len(self.images):
-                self.current_image = self.images[idx][1]
-                # 转换为RGB格式防止通道问题
-                if self.current_image.mode != 'RGB':
-                    self.current_image = self.current_image.convert('RGB')
-                self.graphics_view.load_image(self.current_image)
+                # 界面只显示低分辨率预览，原图在识别时才加载
+                self.current_ref = self.images[idx]
+                # 换页会清空区域：没有模板时沿用上一页画好的区域
+                regions = self.graphics_view.normalized_regions() if self.template is None else None
+                with metrics.timer('ui.load_image'):
+                    self.current_image = self.page_cache.get_preview(self.current_ref)
+                    self.graphics_view.load_image(self.current_image, key=self.current_ref)
+                self.graphics_view.set_regions(regions if regions is not None else self._template_regions())
+                self.prefetcher.navigate(self.images, idx)
         except Exception as e:
             QMessageBox.critical(self, "错误", f"图片加载失败: {str(e)}")
 
+    def _template_regions(self):
+        """模板区域在当前页上的位置（比例坐标），模板带参考图时先在预览图上对齐"""
+        regions = self.template['regions_norm']
+        if self.template['reference'] is None:
+            return regions
+        try:
+            with metrics.timer('ui.align'):
+                return get_aligner(self.template['reference']).align_regions(self.current_image, regions)
+        except Exception as e:
+            print(f"区域对齐失败：{str(e)}")
+            return regions
+
+    def save_region_template(self):
+        """把当前页的区域保存为命名模板，当前页同时作为对齐参考图"""
+        if not self.current_image or not self.graphics_view.rect_items:
+            QMessageBox.warning(self, "警告", "请先选择图片并框选区域")
+            return
+        name, ok = QInputDialog.getText(self, "保存模板", "模板名称:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        try:
+            full_size = self.page_cache.full_size(self.current_ref)
+            regions = self.graphics_view.get_scaled_regions(*full_size)
+            headers = self.table.headers()
+            save_template(template_path(name), regions, full_size, name=name,
+                          field_names=headers if len(headers) == len(regions) else None,
+                          reference=self.current_image)
+            self.template = load_template(template_path(name))
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"模板保存失败: {str(e)}")
+
+    def load_region_template(self):
+        """选择命名模板，之后每页按模板（对齐后）重画区域"""
+        names = [name for name, _ in list_templates()]
+        if not names:
+            QMessageBox.information(self, "提示", "模板目录中还没有模板")
+            return
+        name, ok = QInputDialog.getItem(self, "加载模板", "模板:", names, 0, False)
+        if not ok:
+            return
+        try:
+            self.template = load_template(template_path(name))
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"模板读取失败: {str(e)}")
+            return
+        if self.current_image:
+            self.graphics_view.set_regions(self._template_regions())
+
     def start_ocr(self):
         if not self.current_image or len(self.graphics_view.rect_items) == 0:
             QMessageBox.warning(self, "警告", "请先选择图片并框选区域")
@@ -200,49 +365,84 @@ class MainWindow(QMainWindow):
             # 自动生成字段名称
         self.field_names = [f"区域 {i + 1}" for i in range(len(self.graphics_view.rect_items))]
 
+        # 原图尺寸（电子版 PDF 由文字层页面尺寸推算，无需先渲染）
+        ref = self.current_ref
+        try:
+            full_size = self.page_cache.full_size(ref)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"图片加载失败: {str(e)}")
+            return
+
         # 获取缩放后的坐标
-        self.current_regions = self.graphics_view.get_scaled_regions(
-            self.current_image.width,
-            self.current_image.height
-        )
+        self.current_regions = self.graphics_view.get_scaled_regions(*full_size)
+
+        # 上一次识别还没结束时取消，结果不再写入表格
+        self.cancel_ocr()
 
-        # 启动OCR线程
-        self.ocr_thread = OCRThread(
+        # 先插入空行，各区域识别完成后逐格填入
+        row = self._append_result_row([""] * len(self.field_names))
+
+        # 启动OCR线程：先取文字层，原图只在需要OCR时于后台线程加载
+        from core.ocr_thread import OCRThread  # 通常已由后台预热导入
+        thread = OCRThread(
             self.current_regions,
-            self.current_image,
-            self.field_names
+            lambda: self.page_cache.get_full(ref),
+            self.field_names,
+            ref=ref,
+            image_size=full_size
         )
-        self.ocr_thread.finished.connect(self.update_table)
-        self.ocr_thread.error_occurred.connect(self.handle_error)
-        self.ocr_thread.start()
-
-    def update_table(self, results):
-        """更新表格数据（保留历史列数据）"""
+        thread.setParent(self)  # 由窗口持有，替换 self.ocr_thread 时不会在运行中被回收
+        thread.region_done.connect(lambda idx, name, text: self.table.set_cell(row, idx, text))
+        thread.progress.connect(self.show_ocr_progress)
+        thread.finished.connect(lambda results: self._finish_ocr(thread, results, row))
+        thread.cancelled.connect(lambda: self._finish_ocr(thread, None, row))
+        thread.error_occurred.connect(lambda msg: self._finish_ocr(thread, None, row, msg))
+        self.ocr_thread = thread
+        thread.start()
+
+    def cancel_ocr(self):
+        if self.ocr_thread is not None and self.ocr_thread.isRunning():
+            self.ocr_thread.cancel()
+            self.statusBar().showMessage("已取消上一次识别")
+
+    def show_ocr_progress(self, done, total):
+        self.statusBar().showMessage(f"识别中：{done}/{total} 个区域")
+
+    def _finish_ocr(self, thread, results, row, error_msg=None):
+        """识别线程结束：完成时补齐整行，取消或出错时丢弃未完成的行"""
+        if results is not None:
+            self.update_table(results, row)
+            self.statusBar().showMessage("识别完成", 3000)
+        else:
+            self.table.remove_row(row)
+            if error_msg is not None:
+                self.handle_error(error_msg)
+        thread.wait()
+        thread.deleteLater()
+        if thread is self.ocr_thread:
+            self.ocr_thread = None
+
+    def _append_result_row(self, values):
         current_cols = self.table.columnCount()
-        new_cols = len(results)
-
-        # 动态扩展列数为历史最大值
-        max_cols = max(current_cols, new_cols)
-        if max_cols > current_cols:
-            self.table.setColumnCount(max_cols)
-
-        # 添加新行数据
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-
-        # 填充数据（新数据填充到前N列，其他列留空）
-        for col in range(max_cols):
-            if col < new_cols:
-                name, text = results[col]
-                self.table.setItem(row, col, QTableWidgetItem(text))
-            else:
-                self.table.setItem(row, col, QTableWidgetItem(""))
+        new_cols = len(values)
+
+        # 添加新行数据：新数据填充到前N列，其他列留空，列数随之扩展为历史最大值
+        row = self.table.append_row(values)
 
         # 更新表头（仅扩展，不缩短）
         if new_cols > current_cols:
             headers = [f"区域 {i + 1}" for i in range(new_cols)]
-            self.table.setHorizontalHeaderLabels(headers)
+            self.table.set_headers(headers)
             self.field_names = headers.copy()
+        return row
+
+    def update_table(self, results, row=None):
+        """更新表格数据（保留历史列数据）；row 为识别开始时插入的行"""
+        if row is None:
+            self._append_result_row([text for name, text in results])
+            return
+        for col, (name, text) in enumerate(results):
+            self.table.set_cell(row, col, text)
 
     def _init_table_columns(self, results):
         """初始化表格列"""
@@ -250,9 +450,8 @@ class MainWindow(QMainWindow):
             self.table.horizontalHeader().sectionDoubleClicked.disconnect()
         except TypeError:
             pass
-        self.table.setColumnCount(len(results))
         headers = [name for name, _ in results]
-        self.table.setHorizontalHeaderLabels(headers)
+        self.table.set_headers(headers)
 
         # 启用表头直接编辑
         header = self.table.horizontalHeader()
@@ -261,49 +460,31 @@ class MainWindow(QMainWindow):
 
     def _edit_header_directly(self, logicalIndex):
         """直接编辑表头"""
-        # 获取当前表头项
-        header_item = self.table.horizontalHeaderItem(logicalIndex)
-        current_text = header_item.text() if header_item else ""
-
-        # 创建编辑器
-        self.table.editItem(header_item)  # 自动激活单元格编辑器
-
-        # 监听编辑完成事件
-        def on_edit_finished():
-            new_text = header_item.text()
-            if logicalIndex < len(self.field_names):
-                self.field_names[logicalIndex] = new_text
-            self.table.disconnect(editor)  # 清理信号连接
-
-        editor = self.table.findChild(QLineEdit)
-        if editor:
-            editor.editingFinished.connect(on_edit_finished)
+        # 表头由模型提供，没有可直接编辑的表头项，改用输入框
+        self.edit_header(logicalIndex)
 
     def export_table(self, autosave=False):
         if autosave:
-            path = f"autosave_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        else:
-            path, _ = QFileDialog.getSaveFileName(
-                self, "导出表格", "", "Excel文件 (*.xlsx)")
-            if not path:
-                return
+            # 自动保存走增量日志，不再每次重写整个工作簿
+            self.auto_save()
+            return
+
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出表格", "", "Excel文件 (*.xlsx)")
+        if not path:
+            return
 
         try:
-            headers = [self.table.horizontalHeaderItem(i).text()
-                       for i in range(self.table.columnCount())]
-            data = []
-            for row in range(self.table.rowCount()):
-                row_data = []
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    row_data.append(item.text() if item else "")
-                data.append(row_data)
-
-            df = pd.DataFrame(data, columns=headers)
-            df.to_excel(path, index=False)
-
-            if not autosave:
-                QMessageBox.information(self, "成功", f"文件已保存到：{path}")
+            # 直接按行读取模型数据流式写出
+            with metrics.timer('ui.export_table'):
+                path = write_table(path, self.table.headers(), self.table.iter_rows())
+            # 已导出的数据无需恢复；之后再修改时重新写入完整快照
+            self.autosave_journal.clear()
+            self.table.take_dirty()
+            self._journal_cleared = True
+            self._unexported = False
+
+            QMessageBox.information(self, "成功", f"文件已保存到：{path}")
         except Exception as e:
             QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
 
@@ -1,14 +1,105 @@
-from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QInputDialog
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QTableView, QHeaderView
+from PyQt5.QtCore import Qt, QPersistentModelIndex
+
+from widgets.table_model import ResultTableModel
+
+
+class EditableTable(QTableView):
+    """识别结果表：数据保存在 ResultTableModel 中，视图只绘制可见行"""
 
-class EditableTable(QTableWidget):
     def __init__(self):
         super().__init__()
-        self.setSelectionBehavior(QTableWidget.SelectRows)
-        self.setRowCount(0)
-        self.setColumnCount(1)
-        self.setHorizontalHeaderLabels(["默认字段"])
+        self.table_model = ResultTableModel(["默认字段"])
+        self.setModel(self.table_model)
+        self.setSelectionBehavior(QTableView.SelectRows)
+        # 固定行高，大表滚动时无需逐行计算高度
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.setMinimumSize(400, 600)
+        self._setup_dirty_tracking()
+
+    def _setup_dirty_tracking(self):
+        """记录自上次保存以来变化的行，供增量自动保存使用"""
+        self._dirty_rows = set()
+        self._structure_dirty = False  # 行被删除/插入到中间，行号已错位
+        self._headers_dirty = True
+        model = self.table_model
+        model.dataChanged.connect(
+            lambda top_left, bottom_right, roles=None:
+            self._dirty_rows.update(range(top_left.row(), bottom_right.row() + 1)))
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsRemoved.connect(self._on_structure_changed)
+        model.modelReset.connect(self._on_structure_changed)
+        model.layoutChanged.connect(self._on_structure_changed)
+        model.modelReset.connect(self._on_headers_changed)
+        model.columnsInserted.connect(self._on_headers_changed)
+        model.columnsRemoved.connect(self._on_headers_changed)
+        model.headerDataChanged.connect(
+            lambda orientation, first, last: orientation == Qt.Horizontal and self._on_headers_changed())
+
+    def _on_rows_inserted(self, parent, first, last):
+        if last == self.rowCount() - 1:
+            # 追加在末尾：只需记录新行
+            self._dirty_rows.update(range(first, last + 1))
+        else:
+            self._structure_dirty = True
+
+    def _on_structure_changed(self, *args):
+        self._structure_dirty = True
+
+    def _on_headers_changed(self, *args):
+        self._headers_dirty = True
+
+    def is_dirty(self):
+        return bool(self._dirty_rows or self._structure_dirty or self._headers_dirty)
+
+    def take_dirty(self):
+        """取出并清空脏标记：(变化的行号列表, 结构是否变化, 表头是否变化)"""
+        rows = sorted(r for r in self._dirty_rows if r < self.rowCount())
+        state = (rows, self._structure_dirty, self._headers_dirty)
+        self._dirty_rows = set()
+        self._structure_dirty = False
+        self._headers_dirty = False
+        return state
+
+    def rowCount(self):
+        return self.table_model.rowCount()
+
+    def columnCount(self):
+        return self.table_model.columnCount()
+
+    def headers(self):
+        return self.table_model.headers()
+
+    def set_headers(self, headers):
+        self.table_model.set_headers(headers)
+
+    def set_header(self, section, name):
+        self.table_model.setHeaderData(section, Qt.Horizontal, name)
+
+    def row_values(self, row):
+        return self.table_model.row_values(row)
+
+    def iter_rows(self):
+        return self.table_model.iter_rows()
+
+    def append_row(self, values):
+        """追加一行，返回该行的持久索引（删除其他行后仍指向同一行）"""
+        self.table_model.append_row(values)
+        return QPersistentModelIndex(self.table_model.index(self.rowCount() - 1, 0))
+
+    def set_cell(self, row_handle, col, text):
+        if row_handle.isValid():
+            self.table_model.set_value(row_handle.row(), col, text)
+
+    def remove_row(self, row_handle):
+        if row_handle.isValid():
+            self.table_model.remove_rows([row_handle.row()])
+
+    def append_rows(self, rows):
+        self.table_model.append_rows(rows)
+
+    def load_rows(self, headers, rows):
+        self.table_model.load(headers, rows)
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Delete:
@@ -17,7 +108,8 @@ class EditableTable(QTableWidget):
             super().keyPressEvent(event)
 
     def remove_selected_rows(self):
-        # 获取唯一行索引并倒序删除
-        rows = sorted({index.row() for index in self.selectedIndexes()}, reverse=True)
-        for row in rows:
-            self.removeRow(row)  # 直接按行号删除
\ No newline at end of file
+        # 选中行合并为连续区间后一次删除
+        rows = {index.row() for index in self.selectionModel().selectedRows()}
+        if rows:
+            self.table_model.remove_rows(rows)
+            self.clearSelection()
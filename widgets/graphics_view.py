@@ -1,11 +1,17 @@
-from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QMenu, QGraphicsPixmapItem, QGraphicsRectItem, \
+from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QMenu, QGraphicsRectItem, \
     QGraphicsEllipseItem, QGraphicsTextItem, QGraphicsItem
 from PyQt5.QtCore import Qt, QRectF, QPointF
-from PyQt5.QtGui import QImage, QPixmap, QPainter, QPen, QBrush, QCursor
+from PyQt5.QtGui import QPainter, QPen, QBrush, QCursor
 import weakref
 
 from PyQt5.sip import isdeleted
 
+from widgets.tiled_image import TiledImageItem
+
+
+ZOOM_STEP = 1.25
+MAX_ZOOM = 8.0  # 相对于适应窗口时的倍数
+
 
 class GraphicsView(QGraphicsView):
     def __init__(self):
@@ -14,6 +20,8 @@ class GraphicsView(QGraphicsView):
         self.setScene(self.scene)
         self.setRenderHint(QPainter.Antialiasing)
         self.setDragMode(QGraphicsView.RubberBandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.fit_scale = 1.0
 
         self.current_rect = None
         self.start_pos = None
@@ -21,19 +29,29 @@ class GraphicsView(QGraphicsView):
         self.rect_items = []
         self.drag_start_pos = QPointF()
 
-    def load_image(self, pil_img):
-        """加载图片并重置所有区域"""
+    def load_image(self, pil_img, key=None):
+        """加载图片并重置所有区域
+
+        图片按瓦片分块显示，只上传可见部分；key（如 PageRef）相同的图片复用已缓存的瓦片。
+        """
         self.scene.clear()
         self.rect_items.clear()
 
-        if pil_img.mode != 'RGB':
-            pil_img = pil_img.convert('RGB')
-
-        qimg = QImage(pil_img.tobytes(), pil_img.width, pil_img.height,
-                      pil_img.width * 3, QImage.Format_RGB888)
-        self.pixmap = QGraphicsPixmapItem(QPixmap.fromImage(qimg))
+        self.pixmap = TiledImageItem(pil_img, key=key)
         self.scene.addItem(self.pixmap)
-        self.fitInView(self.scene.itemsBoundingRect(), Qt.KeepAspectRatio)
+        self.scene.setSceneRect(self.pixmap.boundingRect())
+        self.fitInView(self.pixmap.boundingRect(), Qt.KeepAspectRatio)
+        self.fit_scale = self.transform().m11()
+
+    def wheelEvent(self, event):
+        """Ctrl + 滚轮缩放，缩放后只重绘对应层级的可见瓦片"""
+        if not event.modifiers() & Qt.ControlModifier or not hasattr(self, 'pixmap'):
+            super().wheelEvent(event)
+            return
+        factor = ZOOM_STEP if event.angleDelta().y() > 0 else 1 / ZOOM_STEP
+        zoom = self.transform().m11() * factor / self.fit_scale
+        if 1 / MAX_ZOOM <= zoom <= MAX_ZOOM:
+            self.scale(factor, factor)
 
     def _add_region_number(self, item, number):
         """添加区域编号"""
@@ -166,7 +184,7 @@ class GraphicsView(QGraphicsView):
 
     def get_scaled_regions(self, img_w, img_h):
         """获取缩放后的区域坐标"""
-        if not hasattr(self, 'pixmap') or not self.pixmap.pixmap().width():
+        if not hasattr(self, 'pixmap') or not self.pixmap.boundingRect().width():
             return []
 
         regions = []
@@ -196,6 +214,33 @@ class GraphicsView(QGraphicsView):
             regions.append((orig_x1, orig_y1, orig_x2, orig_y2))
         return regions
 
+    def normalized_regions(self):
+        """区域坐标（相对图片宽高的比例），换页或保存模板时使用"""
+        if not hasattr(self, 'pixmap'):
+            return []
+        rect = self.pixmap.boundingRect()
+        width, height = rect.width(), rect.height()
+        if not width or not height:
+            return []
+        return [(x1 / width, y1 / height, x2 / width, y2 / height)
+                for x1, y1, x2, y2 in self.get_scaled_regions(width, height)]
+
+    def set_regions(self, regions):
+        """按比例坐标重画全部区域（替换现有区域）"""
+        if not hasattr(self, 'pixmap'):
+            return
+        for item in self.rect_items:
+            self.scene.removeItem(item)
+        self.rect_items.clear()
+        rect = self.pixmap.boundingRect()
+        for x1, y1, x2, y2 in regions:
+            item = ResizableRectItem(QRectF(QPointF(x1 * rect.width(), y1 * rect.height()),
+                                            QPointF(x2 * rect.width(), y2 * rect.height())))
+            item.setPen(QPen(Qt.red, 2))
+            self.scene.addItem(item)
+            self.rect_items.append(item)
+            self._add_region_number(item, len(self.rect_items))
+
 
 class ResizableRectItem(QGraphicsRectItem):
     """可缩放区域项"""
@@ -0,0 +1,72 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton,
+    QCheckBox, QFileDialog, QMessageBox, QHeaderView
+)
+from PyQt5.QtCore import QTimer
+
+from core import metrics
+
+
+def _format(stats, key):
+    value = stats.get(key)
+    if value is None:
+        return ""
+    if stats['kind'] == metrics.KIND_TIMER and key != 'count':
+        return f"{value * 1000:.1f} ms" if key != 'total' else f"{value:.2f} s"
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+class StatsPanel(QDialog):
+    """性能统计面板：每秒刷新 core.metrics 的计时器/计数器/直方图，可导出 JSON/CSV"""
+
+    COLUMNS = [("名称", 'name'), ("类型", 'kind'), ("次数", 'count'), ("总计", 'total'),
+               ("平均", 'mean'), ("p50", 'p50'), ("p95", 'p95'), ("最大", 'max')]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("性能统计")
+        self.resize(720, 420)
+
+        self.enable_box = QCheckBox("启用统计")
+        self.enable_box.setChecked(metrics.enabled())
+        self.enable_box.toggled.connect(metrics.enable)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _ in self.COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        export_btn = QPushButton("导出")
+        export_btn.clicked.connect(self.export)
+        reset_btn = QPushButton("清零")
+        reset_btn.clicked.connect(lambda: (metrics.reset(), self.refresh()))
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.enable_box)
+        buttons.addStretch()
+        buttons.addWidget(reset_btn)
+        buttons.addWidget(export_btn)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        self.table.setRowCount(len(snapshot))
+        for row, (name, stats) in enumerate(snapshot.items()):
+            for col, (_, key) in enumerate(self.COLUMNS):
+                text = name if key == 'name' else (stats['kind'] if key == 'kind' else _format(stats, key))
+                self.table.setItem(row, col, QTableWidgetItem(text))
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出统计", "metrics.json", "JSON文件 (*.json);;CSV文件 (*.csv)")
+        if not path:
+            return
+        try:
+            metrics.export(path)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
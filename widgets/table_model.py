@@ -0,0 +1,173 @@
+from bisect import bisect_left
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+def contiguous_ranges(rows):
+    """把行号集合合并为 (起始行, 行数) 的连续区间，按行号升序"""
+    ranges = []
+    for row in sorted(set(rows)):
+        if ranges and ranges[-1][0] + ranges[-1][1] == row:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([row, 1])
+    return [tuple(r) for r in ranges]
+
+
+class ResultTableModel(QAbstractTableModel):
+    """按列存储的识别结果表：每列一个字符串列表，导出时直接按行读取，无需逐个单元格控件"""
+
+    def __init__(self, headers=None):
+        super().__init__()
+        self._headers = list(headers or [])
+        self._columns = [[] for _ in self._headers]
+        self._row_count = 0
+
+    # region Qt 模型接口
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self._columns[index.column()][index.row()]
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        self._columns[index.column()][index.row()] = "" if value is None else str(value)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        return str(section + 1)
+
+    def setHeaderData(self, section, orientation, value, role=Qt.EditRole):
+        if orientation != Qt.Horizontal or not 0 <= section < len(self._headers):
+            return False
+        self._headers[section] = str(value)
+        self.headerDataChanged.emit(orientation, section, section)
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if count <= 0 or row < 0 or row + count > self._row_count:
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        for column in self._columns:
+            del column[row:row + count]
+        self._row_count -= count
+        self.endRemoveRows()
+        return True
+    # endregion
+
+    def headers(self):
+        return list(self._headers)
+
+    def set_headers(self, headers):
+        """设置表头，列数随之增减"""
+        headers = list(headers)
+        self.set_column_count(len(headers))
+        self._headers = headers
+        if headers:
+            self.headerDataChanged.emit(Qt.Horizontal, 0, len(headers) - 1)
+
+    def set_column_count(self, count):
+        current = len(self._columns)
+        if count > current:
+            self.beginInsertColumns(QModelIndex(), current, count - 1)
+            for i in range(current, count):
+                self._columns.append([""] * self._row_count)
+                self._headers.append(str(i + 1))
+            self.endInsertColumns()
+        elif count < current:
+            self.beginRemoveColumns(QModelIndex(), count, current - 1)
+            del self._columns[count:]
+            del self._headers[count:]
+            self.endRemoveColumns()
+
+    def append_row(self, values):
+        """在末尾追加一行，不足的列补空"""
+        self.append_rows([values])
+
+    def append_rows(self, rows):
+        """批量追加多行，只发出一次插入通知"""
+        rows = [list(values) for values in rows]
+        if not rows:
+            return
+        width = max(len(values) for values in rows)
+        if width > len(self._columns):
+            self.set_column_count(width)
+        first = self._row_count
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for col, column in enumerate(self._columns):
+            column.extend(str(values[col]) if col < len(values) else "" for values in rows)
+        self._row_count += len(rows)
+        self.endInsertRows()
+
+    def remove_rows(self, rows):
+        """删除任意行号集合，返回删除的行数
+
+        只有一个连续区间时走标准的 removeRows；多个区间时一次性重建各列，
+        重新映射选区等持久索引后只发出一次 layoutChanged，避免逐行刷新视图。
+        """
+        ranges = contiguous_ranges(r for r in rows if 0 <= r < self._row_count)
+        if not ranges:
+            return 0
+        if len(ranges) == 1:
+            self.removeRows(*ranges[0])
+            return ranges[0][1]
+
+        removed = sorted(r for start, count in ranges for r in range(start, start + count))
+        removed_set = set(removed)
+        self.layoutAboutToBeChanged.emit()
+        self._columns = [[value for row, value in enumerate(column) if row not in removed_set]
+                         for column in self._columns]
+        self._row_count -= len(removed)
+
+        old_indexes = self.persistentIndexList()
+        new_indexes = []
+        for index in old_indexes:
+            if index.row() in removed_set:
+                new_indexes.append(QModelIndex())
+            else:
+                new_indexes.append(self.index(index.row() - bisect_left(removed, index.row()),
+                                              index.column()))
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+        return len(removed)
+
+    def set_value(self, row, col, value):
+        """修改单个单元格，列不够时自动扩展"""
+        if col >= len(self._columns):
+            self.set_column_count(col + 1)
+        return self.setData(self.index(row, col), value)
+
+    def load(self, headers, rows):
+        """整体替换表格内容"""
+        self.beginResetModel()
+        self._headers = list(headers)
+        width = max([len(self._headers)] + [len(row) for row in rows])
+        self._headers += [str(i + 1) for i in range(len(self._headers), width)]
+        self._columns = [[str(row[col]) if col < len(row) else "" for row in rows]
+                         for col in range(width)]
+        self._row_count = len(rows)
+        self.endResetModel()
+
+    def row_values(self, row):
+        return [column[row] for column in self._columns]
+
+    def iter_rows(self):
+        """按行产出数据，供导出直接写入文件"""
+        return zip(*self._columns) if self._columns else iter(())
@@ -0,0 +1,133 @@
+import itertools
+import math
+import os
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QPixmap, QPainter
+
+
+TILE_SIZE = 512
+# 瓦片缓存字节预算（MB），多页之间共享
+DEFAULT_TILE_CACHE_BYTES = int(os.environ.get("TILE_CACHE_MB", "128")) * 1024 * 1024
+
+_anonymous_keys = itertools.count()
+
+
+class TileCache:
+    """已上传到显存的瓦片（QPixmap）LRU 缓存，超出字节预算时淘汰最久未用的瓦片"""
+
+    def __init__(self, max_bytes=DEFAULT_TILE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            pixmap = self._tiles.get(key)
+            if pixmap is not None:
+                self._tiles.move_to_end(key)
+            return pixmap
+
+    def put(self, key, pixmap):
+        size = pixmap.width() * pixmap.height() * 4
+        with self._lock:
+            old = self._tiles.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old.width() * old.height() * 4
+            self._tiles[key] = pixmap
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and len(self._tiles) > 1:
+                _, evicted = self._tiles.popitem(last=False)
+                self.current_bytes -= evicted.width() * evicted.height() * 4
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            self.current_bytes = 0
+
+
+_tile_cache = None
+
+
+def get_tile_cache():
+    global _tile_cache
+    if _tile_cache is None:
+        _tile_cache = TileCache()
+    return _tile_cache
+
+
+class TiledImageItem(QGraphicsItem):
+    """分块 + 多级缩略（金字塔）显示的大图
+
+    场景坐标即原图像素坐标；绘制时按当前缩放选择金字塔层级，只为可见区域的瓦片
+    生成 QPixmap，并缓存在 TileCache 中，切换回已看过的页面时无需重新上传。
+    """
+
+    def __init__(self, pil_img, key=None, cache=None, tile_size=TILE_SIZE):
+        super().__init__()
+        if pil_img.mode != 'RGB':
+            pil_img = pil_img.convert('RGB')
+        self.tile_size = tile_size
+        self.cache = cache or get_tile_cache()
+        # 同一页的不同尺寸图像不能共用瓦片
+        self.key = (key if key is not None else next(_anonymous_keys), pil_img.size)
+        self._levels = [pil_img]  # 第 k 层为原图缩小 2^k 倍，按需生成
+        self.max_level = max(0, math.ceil(math.log2(max(pil_img.size) / tile_size)))
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+
+    @property
+    def image_size(self):
+        return self._levels[0].size
+
+    def boundingRect(self):
+        width, height = self.image_size
+        return QRectF(0, 0, width, height)
+
+    def _level_image(self, level):
+        while len(self._levels) <= level:
+            self._levels.append(self._levels[-1].reduce(2))
+        return self._levels[level]
+
+    def _level_for(self, scale):
+        """屏幕上每个原图像素不足半个像素时换用更小的一层"""
+        if scale <= 0:
+            return self.max_level
+        return max(0, min(self.max_level, int(math.floor(math.log2(1 / scale)))))
+
+    def _tile(self, level, tx, ty):
+        key = self.key + (level, tx, ty)
+        pixmap = self.cache.get(key)
+        if pixmap is None:
+            img = self._level_image(level)
+            left, top = tx * self.tile_size, ty * self.tile_size
+            tile = img.crop((left, top, min(left + self.tile_size, img.width),
+                             min(top + self.tile_size, img.height)))
+            qimg = QImage(tile.tobytes(), tile.width, tile.height,
+                          tile.width * 3, QImage.Format_RGB888)
+            pixmap = QPixmap.fromImage(qimg)
+            self.cache.put(key, pixmap)
+        return pixmap
+
+    def paint(self, painter, option, widget=None):
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        if exposed.isEmpty():
+            return
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        level = self._level_for(scale)
+        factor = 2 ** level
+        span = self.tile_size * factor  # 一块瓦片覆盖的原图像素
+        width, height = self.image_size
+
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        for ty in range(int(exposed.top() // span), int(math.ceil(exposed.bottom() / span))):
+            for tx in range(int(exposed.left() // span), int(math.ceil(exposed.right() / span))):
+                pixmap = self._tile(level, tx, ty)
+                # 缩小时末尾像素向上取整，目标矩形裁到原图范围内
+                target_w = min(pixmap.width() * factor, width - tx * span)
+                target_h = min(pixmap.height() * factor, height - ty * span)
+                painter.drawPixmap(QRectF(tx * span, ty * span, target_w, target_h), pixmap,
+                                   QRectF(0, 0, target_w / factor, target_h / factor))